@@ -0,0 +1,88 @@
+"""Bring existing databases up to the current models
+
+Adds the columns, tables and indexes introduced after the original
+schema.sql (enrollment seat counter, tuition idempotency keys, billing runs,
+shared chat sessions, keyset pagination indexes). Every statement is
+idempotent so databases created from the current schema.sql are unaffected.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Seat counter for atomic enrollment, backfilled from active enrollments
+    op.execute("ALTER TABLE classes ADD COLUMN IF NOT EXISTS enrolled_count INTEGER NOT NULL DEFAULT 0")
+    op.execute("""
+        UPDATE classes c SET enrolled_count = (
+            SELECT count(*) FROM enrollments e
+            WHERE e.class_id = c.id AND e.status = 'active'
+        )
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS enrollments_student_id_class_id_key
+        ON enrollments(student_id, class_id)
+    """)
+
+    # Tuition billing
+    op.execute("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(100)")
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS transactions_idempotency_key_key
+        ON transactions(idempotency_key)
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS billing_runs (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            period DATE UNIQUE NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            last_account_id UUID,
+            accounts_billed INTEGER NOT NULL DEFAULT 0,
+            charges_created INTEGER NOT NULL DEFAULT 0,
+            amount_billed DECIMAL(12,2) NOT NULL DEFAULT 0,
+            started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP WITH TIME ZONE,
+            created_by UUID REFERENCES users(id)
+        )
+    """)
+
+    # Shared chat sessions
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            session_id VARCHAR(64) PRIMARY KEY,
+            history JSONB NOT NULL DEFAULT '[]',
+            size_bytes INTEGER DEFAULT 0,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions(updated_at)")
+
+    # Keyset pagination
+    op.execute("CREATE INDEX IF NOT EXISTS idx_transactions_created_id ON transactions(created_at DESC, id DESC)")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_account_created_id
+        ON transactions(account_id, created_at DESC, id DESC)
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_users_created_id ON users(created_at DESC, id DESC)")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chat_logs_user_created_id
+        ON chat_logs(user_id, created_at DESC, id DESC)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_chat_logs_user_created_id")
+    op.execute("DROP INDEX IF EXISTS idx_users_created_id")
+    op.execute("DROP INDEX IF EXISTS idx_transactions_account_created_id")
+    op.execute("DROP INDEX IF EXISTS idx_transactions_created_id")
+    op.execute("DROP TABLE IF EXISTS chat_sessions")
+    op.execute("DROP TABLE IF EXISTS billing_runs")
+    op.execute("DROP INDEX IF EXISTS transactions_idempotency_key_key")
+    op.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS idempotency_key")
+    op.execute("ALTER TABLE classes DROP COLUMN IF EXISTS enrolled_count")
@@ -0,0 +1,68 @@
+"""Composite, partial and unique indexes matched to the API's hot queries
+
+- enrollments(class_id) WHERE active: capacity counter backfill, rosters
+- enrollments(class_id, enrollment_date, created_at) WHERE waitlisted: waitlist promotion
+- enrollments(student_id, status): dashboard, chat context, student details
+- events(start_date) WHERE is_active: upcoming events (dashboard, chat, list_events)
+- event_participants(event_id, student_id) UNIQUE: duplicate check, registration flags
+- event_participants(student_id): student event history
+- parents(user_id) UNIQUE: parent lookup by logged-in user on most parent routes
+- classes(day_of_week, start_time) WHERE is_active: list_classes / schedule ordering
+
+Indexes are built CONCURRENTLY so the upgrade does not block writes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("idx_enrollments_class_active",
+     "ON enrollments(class_id) WHERE status = 'active'"),
+    ("idx_enrollments_class_waitlisted",
+     "ON enrollments(class_id, enrollment_date, created_at) WHERE status = 'waitlisted'"),
+    ("idx_enrollments_student_status",
+     "ON enrollments(student_id, status)"),
+    ("idx_events_active_start",
+     "ON events(start_date) WHERE is_active"),
+    ("idx_event_participants_student",
+     "ON event_participants(student_id)"),
+    ("idx_classes_active_schedule",
+     "ON classes(day_of_week, start_time) WHERE is_active"),
+]
+
+UNIQUE_INDEXES = [
+    ("idx_event_participants_event_student",
+     "ON event_participants(event_id, student_id)"),
+    ("idx_parents_user",
+     "ON parents(user_id)"),
+]
+
+
+def upgrade() -> None:
+    # Registration used to be check-then-insert; keep one row per duplicate pair
+    op.execute("""
+        DELETE FROM event_participants a
+        USING event_participants b
+        WHERE a.event_id = b.event_id
+          AND a.student_id = b.student_id
+          AND a.ctid > b.ctid
+    """)
+
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+        for name, definition in UNIQUE_INDEXES:
+            op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES + UNIQUE_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
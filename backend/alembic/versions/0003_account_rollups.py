@@ -0,0 +1,67 @@
+"""Per-account billing rollups
+
+Adds running totals (charges, payments, credits) and last activity time to
+accounts, backfilled from the transaction ledger. The API keeps them current
+in the same UPDATE that moves the balance, so billing summaries read one row
+per account instead of aggregating transactions.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("total_charges", "DECIMAL(12,2) NOT NULL DEFAULT 0"),
+    ("total_payments", "DECIMAL(12,2) NOT NULL DEFAULT 0"),
+    ("total_credits", "DECIMAL(12,2) NOT NULL DEFAULT 0"),
+    ("last_activity_at", "TIMESTAMP WITH TIME ZONE"),
+]
+
+
+def upgrade() -> None:
+    for name, definition in COLUMNS:
+        op.execute(f"ALTER TABLE accounts ADD COLUMN IF NOT EXISTS {name} {definition}")
+
+    op.execute("""
+        UPDATE accounts a SET
+            total_charges = t.charges,
+            total_payments = t.payments,
+            total_credits = t.credits,
+            last_activity_at = t.last_activity
+        FROM (
+            SELECT
+                account_id,
+                coalesce(sum(amount) FILTER (
+                    WHERE status = 'completed' AND transaction_type::text <> 'payment' AND amount >= 0
+                ), 0) AS charges,
+                coalesce(sum(-amount) FILTER (
+                    WHERE status = 'completed' AND transaction_type::text = 'payment'
+                ), 0) AS payments,
+                coalesce(sum(-amount) FILTER (
+                    WHERE status = 'completed' AND transaction_type::text <> 'payment' AND amount < 0
+                ), 0) AS credits,
+                max(created_at) AS last_activity
+            FROM transactions
+            GROUP BY account_id
+        ) t
+        WHERE t.account_id = a.id
+    """)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_balance "
+            "ON accounts(current_balance DESC)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_accounts_balance")
+    for name, _ in reversed(COLUMNS):
+        op.execute(f"ALTER TABLE accounts DROP COLUMN IF EXISTS {name}")
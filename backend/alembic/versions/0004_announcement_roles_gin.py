@@ -0,0 +1,28 @@
+"""GIN index on announcements.target_roles
+
+Serves the per-role announcement feed's `target_roles @> ARRAY[role]`
+test on cache misses without scanning the table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_announcements_target_roles "
+            "ON announcements USING gin (target_roles) WHERE is_active"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_announcements_target_roles")
@@ -0,0 +1,31 @@
+"""Partial index for announcements addressed to everyone
+
+The per-role feed reads role-targeted rows through the GIN index on
+target_roles and untargeted rows through this one; an empty target_roles
+array is folded into NULL so "everyone" has a single indexable form.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE announcements SET target_roles = NULL WHERE cardinality(target_roles) = 0")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_announcements_everyone "
+            "ON announcements(publish_date) WHERE is_active AND target_roles IS NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_announcements_everyone")
@@ -7,7 +7,7 @@ from datetime import datetime
 from app.database import get_db
 from app.models.models import User, Parent
 from app.schemas.schemas import UserCreate, UserLogin, Token, UserResponse
-from app.auth import verify_password, get_password_hash, create_access_token
+from app.auth import verify_password_async, get_password_hash_async, create_access_token
 
 router = APIRouter()
 
@@ -21,7 +21,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Create user
     user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         phone=user_data.phone,
@@ -51,7 +51,7 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await verify_password_async(credentials.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     if not user.is_active:
@@ -1,16 +1,26 @@
 """Billing and account routes"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, case
+from sqlalchemy import select, and_, func
 from typing import List, Optional
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
 from app.database import get_db
 from app.models.models import Account, Transaction, Parent, User, Student
-from app.schemas.schemas import AccountResponse, TransactionResponse, TransactionCreate
+from app.schemas.schemas import (
+    AccountResponse, AccountSummaryResponse, FamilyAccountSummaryResponse, TransactionResponse, TransactionCreate
+)
 from app.auth import get_current_active_user, check_role
+from app.services.invalidation import invalidation_bus, AccountChanged
+from app.services import ledger_service, tuition_billing
+from app.services.aging_report import aging_report_cache, CSV_HEADER, row_to_dict, summarize
+from app.services.exports import csv_chunks, export_response
+from app.services.pagination import paginate_newest_first, set_next_cursor
+from app.config import get_settings
 
+settings = get_settings()
 router = APIRouter(prefix="/billing", tags=["billing"])
 
 @router.get("/account", response_model=AccountResponse)
@@ -73,14 +83,20 @@ async def get_account_by_parent(
 
 @router.get("/transactions", response_model=List[TransactionResponse])
 async def get_transactions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     transaction_type: Optional[str] = None,
     status_filter: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get transactions for current parent or all (staff)"""
+    """Get transactions for current parent or all (staff), newest first.
+
+    Pass the X-Next-Cursor header from the previous page as `cursor`;
+    `skip` is kept for older clients.
+    """
     query = select(Transaction)
     
     if current_user.role == "parent":
@@ -112,29 +128,66 @@ async def get_transactions(
     if status_filter:
         query = query.where(Transaction.status == status_filter)
     
-    query = query.order_by(Transaction.created_at.desc()).offset(skip).limit(limit)
+    query = paginate_newest_first(query, Transaction, cursor, skip, limit)
     
     result = await db.execute(query)
     transactions = result.scalars().all()
+    set_next_cursor(response, transactions, limit)
     return transactions
 
+TRANSACTION_COLUMNS = [
+    "id", "account_id", "student_id", "amount", "transaction_type", "description",
+    "status", "payment_method", "due_date", "paid_date", "created_at"
+]
+
+@router.get("/transactions/export")
+async def export_transactions(
+    fmt: str = Query("csv", alias="format"),
+    account_id: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: User = Depends(check_role(["owner", "admin", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream the transaction ledger as CSV or NDJSON, oldest first (staff only)"""
+    query = select(
+        Transaction.id, Transaction.account_id, Transaction.student_id, Transaction.amount,
+        Transaction.transaction_type, Transaction.description, Transaction.status,
+        Transaction.payment_method, Transaction.due_date, Transaction.paid_date,
+        Transaction.created_at
+    )
+    if account_id:
+        query = query.where(Transaction.account_id == account_id)
+    if transaction_type:
+        query = query.where(Transaction.transaction_type == transaction_type)
+    if start_date:
+        query = query.where(Transaction.created_at >= start_date)
+    if end_date:
+        query = query.where(Transaction.created_at < end_date + timedelta(days=1))
+    
+    query = query.order_by(Transaction.created_at, Transaction.id)
+    return export_response(query, TRANSACTION_COLUMNS, fmt, "transactions")
+
 @router.get("/transactions/{account_id}", response_model=List[TransactionResponse])
 async def get_transactions_by_account(
     account_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(check_role(["owner", "admin", "finance"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get transactions by account ID (staff only)"""
     result = await db.execute(
-        select(Transaction)
-        .where(Transaction.account_id == account_id)
-        .order_by(Transaction.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        paginate_newest_first(
+            select(Transaction).where(Transaction.account_id == account_id),
+            Transaction, cursor, skip, limit
+        )
     )
     transactions = result.scalars().all()
+    set_next_cursor(response, transactions, limit)
     return transactions
 
 @router.post("/transactions", status_code=status.HTTP_201_CREATED, response_model=TransactionResponse)
@@ -144,11 +197,11 @@ async def create_transaction(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new transaction (staff only)"""
-    # Verify account exists
-    result = await db.execute(
-        select(Account).where(Account.id == transaction.account_id)
+    # Apply balance change atomically (also verifies the account exists)
+    # Positive amount = debit (owes more), Negative = credit (payment/credit)
+    account = await ledger_service.apply_delta(
+        db, transaction.account_id, Decimal(str(transaction.amount)), transaction.transaction_type
     )
-    account = result.scalar_one_or_none()
     
     if not account:
         raise HTTPException(
@@ -165,12 +218,8 @@ async def create_transaction(
     
     db.add(new_transaction)
     
-    # Update account balance
-    # Positive amount = debit (owes more), Negative = credit (payment/credit)
-    account.current_balance += Decimal(str(transaction.amount))
-    account.updated_at = datetime.utcnow()
-    
     await db.commit()
+    await invalidation_bus.publish(AccountChanged(parent_id=str(account.parent_id)))
     await db.refresh(new_transaction)
     
     return new_transaction
@@ -185,30 +234,24 @@ async def make_payment(
     db: AsyncSession = Depends(get_db)
 ):
     """Make a payment (parent or staff)"""
+    parent_id = None
     if current_user.role == "parent":
-        # Verify account belongs to parent
+        # Payment must target the parent's own account
         result = await db.execute(
-            select(Parent).where(Parent.user_id == current_user.id)
+            select(Parent.id).where(Parent.user_id == current_user.id)
         )
-        parent = result.scalar_one_or_none()
+        parent_id = result.scalar_one_or_none()
         
-        if not parent:
+        if not parent_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Parent profile not found"
             )
-        
-        account_result = await db.execute(
-            select(Account).where(
-                and_(Account.id == account_id, Account.parent_id == parent.id)
-            )
-        )
-    else:
-        account_result = await db.execute(
-            select(Account).where(Account.id == account_id)
-        )
     
-    account = account_result.scalar_one_or_none()
+    # Apply balance change atomically (payment = credit)
+    account = await ledger_service.apply_delta(
+        db, account_id, -Decimal(str(amount)), "payment", parent_id=parent_id
+    )
     
     if not account:
         raise HTTPException(
@@ -231,11 +274,8 @@ async def make_payment(
     
     db.add(payment_transaction)
     
-    # Update account balance
-    account.current_balance -= Decimal(str(amount))
-    account.updated_at = datetime.utcnow()
-    
     await db.commit()
+    await invalidation_bus.publish(AccountChanged(parent_id=str(account.parent_id)))
     
     return {"message": "Payment processed successfully", "transaction_id": str(payment_transaction.id)}
 
@@ -250,22 +290,10 @@ async def create_charge(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a charge (staff only)"""
-    # Verify account exists
-    result = await db.execute(
-        select(Account).where(Account.id == account_id)
-    )
-    account = result.scalar_one_or_none()
-    
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found"
-        )
-    
     # If student_id provided, verify exists
     if student_id:
         student_result = await db.execute(
-            select(Student).where(Student.id == student_id)
+            select(Student.id).where(Student.id == student_id)
         )
         if not student_result.scalar_one_or_none():
             raise HTTPException(
@@ -273,6 +301,15 @@ async def create_charge(
                 detail="Student not found"
             )
     
+    # Apply balance change atomically (charge = debit)
+    account = await ledger_service.apply_delta(db, account_id, Decimal(str(amount)), "charge")
+    
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found"
+        )
+    
     # Create charge transaction (positive amount = debit)
     charge_transaction = Transaction(
         account_id=account_id,
@@ -287,22 +324,77 @@ async def create_charge(
     
     db.add(charge_transaction)
     
-    # Update account balance
-    account.current_balance += Decimal(str(amount))
-    account.updated_at = datetime.utcnow()
-    
     await db.commit()
+    await invalidation_bus.publish(AccountChanged(parent_id=str(account.parent_id)))
     
     return {"message": "Charge created successfully", "transaction_id": str(charge_transaction.id)}
 
-@router.get("/summary/{parent_id}")
+def _balance_status(balance) -> str:
+    return "credit" if balance < 0 else "due" if balance > 0 else "balanced"
+
+
+def _account_summary(account: Account) -> dict:
+    balance = account.current_balance or 0
+    return {
+        "account_id": str(account.id),
+        "current_balance": float(balance),
+        "total_charges": float(account.total_charges),
+        "total_payments": float(account.total_payments),
+        "total_credits": float(account.total_credits),
+        "last_activity_at": account.last_activity_at.isoformat() if account.last_activity_at else None,
+        "status": _balance_status(balance)
+    }
+
+
+@router.get("/summary", response_model=List[FamilyAccountSummaryResponse])
+async def get_all_billing_summaries(
+    balance_status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(check_role(["owner", "admin", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Billing summary for every family account in one query, largest balance first (staff only)"""
+    balance = func.coalesce(Account.current_balance, 0)
+    query = (
+        select(Account, Parent.id, User.first_name, User.last_name, User.email)
+        .join(Parent, Account.parent_id == Parent.id)
+        .join(User, Parent.user_id == User.id)
+    )
+    if balance_status == "due":
+        query = query.where(balance > 0)
+    elif balance_status == "credit":
+        query = query.where(balance < 0)
+    elif balance_status == "balanced":
+        query = query.where(balance == 0)
+    elif balance_status is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="balance_status must be one of: due, credit, balanced"
+        )
+
+    result = await db.execute(
+        query.order_by(Account.current_balance.desc(), Account.id).offset(skip).limit(limit)
+    )
+
+    return [
+        {
+            **_account_summary(account),
+            "parent_id": str(parent_id),
+            "parent_name": f"{first_name} {last_name}",
+            "email": email
+        }
+        for account, parent_id, first_name, last_name, email in result.all()
+    ]
+
+
+@router.get("/summary/{parent_id}", response_model=AccountSummaryResponse)
 async def get_billing_summary(
     parent_id: str,
     current_user: User = Depends(check_role(["owner", "admin", "finance"])),
     db: AsyncSession = Depends(get_db)
 ):
     """Get billing summary for parent (staff only)"""
-    # Get account
     account_result = await db.execute(
         select(Account).where(Account.parent_id == parent_id)
     )
@@ -314,24 +406,79 @@ async def get_billing_summary(
             detail="Account not found"
         )
     
-    # Get total charges and payments
-    result = await db.execute(
-        select(
-            func.sum(
-                case((Transaction.transaction_type == "charge", Transaction.amount), else_=0)
-            ).label("total_charges"),
-            func.sum(
-                case((Transaction.transaction_type == "payment", Transaction.amount), else_=0)
-            ).label("total_payments")
-        ).where(Transaction.account_id == account.id)
-    )
-    
-    summary = result.first()
-    
+    # Running totals are kept on the account row by ledger_service.apply_delta
+    return _account_summary(account)
+
+
+@router.get("/aging")
+async def get_aging_report(
+    as_of: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(check_role(["owner", "admin", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Accounts receivable aging (current / 30 / 60 / 90+ days past due) for all accounts (staff only)"""
+    as_of = as_of or date.today()
+    rows = await aging_report_cache.get(db, as_of)
     return {
-        "account_id": str(account.id),
-        "current_balance": float(account.current_balance),
-        "total_charges": float(summary.total_charges or 0),
-        "total_payments": float(abs(summary.total_payments or 0)),
-        "status": "credit" if account.current_balance < 0 else "due" if account.current_balance > 0 else "balanced"
+        "as_of": as_of.isoformat(),
+        "accounts_due": len(rows),
+        "totals": summarize(rows),
+        "accounts": [row_to_dict(row) for row in rows[skip:skip + limit]]
     }
+
+
+@router.get("/aging.csv")
+async def export_aging_report(
+    as_of: Optional[date] = None,
+    current_user: User = Depends(check_role(["owner", "admin", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Download the full aging report as CSV (staff only)"""
+    as_of = as_of or date.today()
+    rows = await aging_report_cache.get(db, as_of)
+    return StreamingResponse(
+        csv_chunks(CSV_HEADER, rows),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="aging-{as_of.isoformat()}.csv"'}
+    )
+
+
+@router.post("/reconcile")
+async def reconcile_balances(
+    apply: bool = False,
+    current_user: User = Depends(check_role(["owner", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Report accounts whose balance differs from their transaction ledger; optionally correct them"""
+    report = await ledger_service.reconcile_balances(db, apply=apply)
+    if report["applied"]:
+        await db.commit()
+        await invalidation_bus.publish(AccountChanged())
+    return report
+
+
+@router.post("/tuition-run")
+async def run_tuition_billing(
+    period: Optional[date] = None,
+    current_user: User = Depends(check_role(["owner", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bill monthly tuition for all active enrollments (idempotent per month, resumes after a crash)"""
+    try:
+        report = await tuition_billing.run_tuition_billing(
+            db,
+            period=period or date.today(),
+            due_day=settings.tuition_due_day,
+            batch_size=settings.tuition_billing_batch_size,
+            created_by=current_user.id
+        )
+    except tuition_billing.BillingRunInProgressError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A tuition run for this period is already running"
+        )
+    if not report["already_completed"]:
+        await invalidation_bus.publish(AccountChanged())
+    return report
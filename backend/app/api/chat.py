@@ -1,16 +1,21 @@
 """AI chat routes with Gemini integration"""
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
 from datetime import datetime
+import json
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.models import User, ChatLog, Parent, Account, Transaction, Student, Enrollment, Event, DanceClass
 from app.schemas.schemas import ChatMessage, ChatResponse
 from app.auth import get_current_active_user, get_current_user
 from app.services.gemini_service import gemini_service
+from app.services.context_cache import chat_context_cache
+from app.services.chat_log_writer import chat_log_writer
+from app.services.pagination import paginate_newest_first, set_next_cursor
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -26,21 +31,7 @@ async def chat(
     user_message = message_data.message
     
     try:
-        # Build context based on user role
-        context = ""
-        if is_authenticated:
-            context = await build_user_context(current_user, db)
-        else:
-            context = await build_public_context(db)
-        
-        # Create system prompt
-        system_prompt = f"""You are a helpful assistant for Studio4 Dance Company.
-You help parents, students, and visitors with questions about classes, events, billing, and general information.
-
-{context}
-
-Be friendly, professional, and concise. If you don't know specific details, suggest contacting the studio directly.
-"""
+        system_prompt = await build_system_prompt(current_user, db)
         
         # Get response from Gemini
         ai_response = await gemini_service.generate_response(
@@ -49,16 +40,14 @@ Be friendly, professional, and concise. If you don't know specific details, sugg
             session_id=session_id
         )
         
-        # Log the conversation
-        chat_log = ChatLog(
+        # Log the conversation (flushed in batches by the background writer)
+        chat_log_writer.submit(
             user_id=current_user.id if current_user else None,
             session_id=session_id,
             message=user_message,
             response=ai_response,
             is_authenticated=is_authenticated
         )
-        db.add(chat_log)
-        await db.commit()
         
         return ChatResponse(
             success=True,
@@ -74,9 +63,85 @@ Be friendly, professional, and concise. If you don't know specific details, sugg
         )
 
 
-async def build_user_context(user: User, db: AsyncSession) -> str:
-    """Build context for authenticated user based on their role"""
+@router.post("/stream")
+async def chat_stream(
+    message_data: ChatMessage,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Chat with AI assistant, streaming tokens as server-sent events"""
+    session_id = message_data.session_id or str(uuid.uuid4())
+    user_message = message_data.message
+    user_id = current_user.id if current_user else None
+    system_prompt = await build_system_prompt(current_user, db)
+    
+    async def event_stream():
+        chunks = []
+        try:
+            async for text in gemini_service.stream_response(
+                user_message=user_message,
+                system_prompt=system_prompt,
+                session_id=session_id
+            ):
+                chunks.append(text)
+                yield f"data: {json.dumps({'text': text})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e), 'session_id': session_id})}\n\n"
+            return
+        
+        chat_log_writer.submit(
+            user_id=user_id,
+            session_id=session_id,
+            message=user_message,
+            response="".join(chunks),
+            is_authenticated=user_id is not None
+        )
+        
+        yield f"event: done\ndata: {json.dumps({'session_id': session_id})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def build_system_prompt(user: Optional[User], db: AsyncSession) -> str:
+    """Build the system prompt with context for the current user role (cached per version)"""
+    if user is None:
+        prompt = chat_context_cache.get_public()
+        if prompt is None:
+            token = chat_context_cache.token()
+            prompt = render_system_prompt(await build_public_context(db))
+            chat_context_cache.set_public(prompt, token)
+        return prompt
+    
+    prompt = chat_context_cache.get_user(user.id)
+    if prompt is None:
+        token = chat_context_cache.token()
+        context, parent_id = await build_user_context(user, db)
+        prompt = render_system_prompt(context)
+        chat_context_cache.set_user(user.id, prompt, token, parent_id=parent_id)
+    return prompt
+
+
+def render_system_prompt(context: str) -> str:
+    return f"""You are a helpful assistant for Studio4 Dance Company.
+You help parents, students, and visitors with questions about classes, events, billing, and general information.
+
+{context}
+
+Be friendly, professional, and concise. If you don't know specific details, suggest contacting the studio directly.
+"""
+
+
+async def build_user_context(user: User, db: AsyncSession) -> tuple:
+    """Build context for authenticated user based on their role.
+
+    Returns the context text and the parent id it was built from (if any).
+    """
     context_parts = [f"User: {user.first_name} {user.last_name} ({user.role})"]
+    parent_id = None
     
     if user.role == "parent":
         # Get parent's students, enrollments, balance, upcoming events
@@ -86,6 +151,8 @@ async def build_user_context(user: User, db: AsyncSession) -> str:
         parent = result.scalar_one_or_none()
         
         if parent:
+            parent_id = parent.id
+            
             # Get students
             students_result = await db.execute(
                 select(Student).where(Student.parent_id == parent.id)
@@ -139,7 +206,7 @@ async def build_user_context(user: User, db: AsyncSession) -> str:
         for event in events:
             context_parts.append(f"- {event.title} on {event.start_date}")
     
-    return "\n".join(context_parts)
+    return "\n".join(context_parts), parent_id
 
 
 async def build_public_context(db: AsyncSession) -> str:
@@ -179,21 +246,24 @@ async def build_public_context(db: AsyncSession) -> str:
 
 @router.get("/history")
 async def get_chat_history(
+    response: Response,
     session_id: Optional[str] = None,
     limit: int = 20,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get chat history for authenticated user"""
+    """Get chat history for authenticated user, newest first; page with the X-Next-Cursor header"""
     query = select(ChatLog).where(ChatLog.user_id == current_user.id)
     
     if session_id:
         query = query.where(ChatLog.session_id == session_id)
     
-    query = query.order_by(ChatLog.created_at.desc()).limit(limit)
+    query = paginate_newest_first(query, ChatLog, cursor, 0, limit)
     
     result = await db.execute(query)
     logs = result.scalars().all()
+    set_next_cursor(response, logs, limit)
     
     return [
         {
@@ -224,4 +294,7 @@ async def clear_chat_history(
     await db.execute(query)
     await db.commit()
     
+    if session_id:
+        await gemini_service.sessions.delete(session_id)
+    
     return {"message": "Chat history cleared"}
@@ -1,30 +1,44 @@
 """Dance class routes"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 from typing import List, Optional
 from datetime import date
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.models import (
     DanceClass, DanceStyle, ClassLevel, Instructor,
     Enrollment, Student, Parent, User
 )
-from app.schemas.schemas import DanceClassResponse, DanceClassCreate
+from app.schemas.schemas import (
+    DanceClassResponse, DanceClassCreate, BatchEnrollmentRequest, BatchEnrollmentResponse
+)
 from app.auth import get_current_active_user, check_role
+from app.services.invalidation import invalidation_bus, EnrollmentChanged
+from app.services import enrollment_service
+from app.services.schedule_cache import schedule_cache
+from app.services.exports import export_response
 
 router = APIRouter(prefix="/classes", tags=["classes"])
 
+def _class_response(dance_class: DanceClass, waitlist_count: int) -> DanceClassResponse:
+    return DanceClassResponse.model_validate(dance_class).model_copy(update={
+        "seats_remaining": max((dance_class.max_capacity or 0) - dance_class.enrolled_count, 0),
+        "waitlist_count": waitlist_count
+    })
+
 @router.get("/", response_model=List[DanceClassResponse])
 async def list_classes(
     style_id: Optional[str] = None,
     level_id: Optional[str] = None,
     day_of_week: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List all active dance classes with optional filters"""
-    query = select(DanceClass).where(DanceClass.is_active == True)
+    """List all active dance classes with optional filters, including seats left and waitlist length"""
+    query = enrollment_service.with_availability(
+        select(DanceClass), enrollment_service.waitlist_counts()
+    ).where(DanceClass.is_active == True)
     
     if style_id:
         query = query.where(DanceClass.style_id == style_id)
@@ -36,8 +50,77 @@ async def list_classes(
     query = query.order_by(DanceClass.day_of_week, DanceClass.start_time)
     
     result = await db.execute(query)
-    classes = result.scalars().all()
-    return classes
+    return [_class_response(dance_class, waitlisted) for dance_class, waitlisted in result.all()]
+
+@router.get("/schedule", response_model=List[dict])
+async def get_schedule(
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get class schedule (public view), served pre-encoded with ETag revalidation"""
+    body, etag = await schedule_cache.get()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+ROSTER_COLUMNS = [
+    "enrollment_id", "student_id", "first_name", "last_name", "date_of_birth",
+    "status", "enrollment_date", "parent_name", "parent_email", "parent_phone"
+]
+
+@router.get("/{class_id}/roster/export")
+async def export_class_roster(
+    class_id: str,
+    fmt: str = Query("csv", alias="format"),
+    include_waitlist: bool = True,
+    current_user: User = Depends(check_role(["owner", "admin", "instructor"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a class roster as CSV or NDJSON, active students first (staff only)"""
+    dance_class = await db.scalar(select(DanceClass.id).where(DanceClass.id == class_id))
+    if not dance_class:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Class not found"
+        )
+    
+    statuses = [enrollment_service.ACTIVE]
+    if include_waitlist:
+        statuses.append(enrollment_service.WAITLISTED)
+    
+    query = (
+        select(
+            Enrollment.id,
+            Student.id,
+            Student.first_name,
+            Student.last_name,
+            Student.date_of_birth,
+            Enrollment.status,
+            Enrollment.enrollment_date,
+            func.concat(User.first_name, " ", User.last_name),
+            User.email,
+            User.phone
+        )
+        .join(Student, Enrollment.student_id == Student.id)
+        .join(Parent, Student.parent_id == Parent.id)
+        .join(User, Parent.user_id == User.id)
+        .where(
+            and_(
+                Enrollment.class_id == class_id,
+                Enrollment.status.in_(statuses)
+            )
+        )
+        .order_by(
+            Enrollment.status == enrollment_service.WAITLISTED,
+            Student.last_name,
+            Student.first_name,
+            Enrollment.id
+        )
+    )
+    return export_response(query, ROSTER_COLUMNS, fmt, f"class-{class_id}-roster")
 
 @router.get("/{class_id}", response_model=DanceClassResponse)
 async def get_class(
@@ -45,28 +128,94 @@ async def get_class(
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get specific class details"""
+    """Get specific class details, including seats left and waitlist length"""
     result = await db.execute(
-        select(DanceClass).where(DanceClass.id == class_id)
+        select(DanceClass, func.count(Enrollment.id))
+        .outerjoin(
+            Enrollment,
+            and_(
+                Enrollment.class_id == DanceClass.id,
+                Enrollment.status == enrollment_service.WAITLISTED
+            )
+        )
+        .where(DanceClass.id == class_id)
+        .group_by(DanceClass.id)
     )
-    dance_class = result.scalar_one_or_none()
+    row = result.one_or_none()
     
-    if not dance_class:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Class not found"
         )
     
-    return dance_class
+    return _class_response(*row)
+
+@router.post("/enroll/batch", response_model=BatchEnrollmentResponse)
+async def enroll_batch(
+    request: BatchEnrollmentRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Enroll several students in several classes at once (parent or admin)"""
+    parent_id = None
+    if current_user.role == "parent":
+        parent_result = await db.execute(
+            select(Parent.id).where(Parent.user_id == current_user.id)
+        )
+        parent_id = parent_result.scalar_one_or_none()
+        if parent_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to enroll students"
+            )
+
+    results = await enrollment_service.enroll_batch(
+        db,
+        [(pair.student_id, pair.class_id) for pair in request.enrollments],
+        parent_id=parent_id,
+        allow_waitlist=request.waitlist
+    )
+    counts = {
+        outcome: sum(1 for result in results if result["status"] == outcome)
+        for outcome in (enrollment_service.ACTIVE, enrollment_service.WAITLISTED, enrollment_service.REJECTED)
+    }
+    committed = counts[enrollment_service.REJECTED] < len(results) and not (
+        request.atomic and counts[enrollment_service.REJECTED]
+    )
+    response = BatchEnrollmentResponse(
+        committed=committed,
+        enrolled=counts[enrollment_service.ACTIVE] if committed else 0,
+        waitlisted=counts[enrollment_service.WAITLISTED] if committed else 0,
+        rejected=counts[enrollment_service.REJECTED],
+        results=results
+    )
+
+    if not committed:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=response.model_dump(mode="json")
+        )
+
+    await db.commit()
+    enrolled = {
+        (result["parent_id"], result["class_id"])
+        for result in results if result["status"] != enrollment_service.REJECTED
+    }
+    for enrolled_parent_id, class_id in enrolled:
+        await invalidation_bus.publish(EnrollmentChanged(parent_id=str(enrolled_parent_id), class_id=str(class_id)))
+    return response
 
 @router.post("/{class_id}/enroll/{student_id}", status_code=status.HTTP_201_CREATED)
 async def enroll_student(
     class_id: str,
     student_id: str,
+    waitlist: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Enroll a student in a class (parent or admin)"""
+    """Enroll a student in a class (parent or admin); join the waitlist when full if requested"""
     # Verify student exists and belongs to parent (if user is parent)
     result = await db.execute(select(Student).where(Student.id == student_id))
     student = result.scalar_one_or_none()
@@ -90,63 +239,36 @@ async def enroll_student(
                 detail="Not authorized to enroll this student"
             )
     
-    # Verify class exists
-    class_result = await db.execute(
-        select(DanceClass).where(DanceClass.id == class_id)
-    )
-    dance_class = class_result.scalar_one_or_none()
-    
-    if not dance_class:
+    # Reserve a seat and record the enrollment atomically
+    try:
+        enrollment_status = await enrollment_service.enroll(
+            db, student_id, class_id, allow_waitlist=waitlist
+        )
+    except enrollment_service.ClassNotFoundError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Class not found"
         )
-    
-    # Check if already enrolled
-    existing_enrollment = await db.execute(
-        select(Enrollment).where(
-            and_(
-                Enrollment.student_id == student_id,
-                Enrollment.class_id == class_id,
-                Enrollment.status == "active"
-            )
-        )
-    )
-    if existing_enrollment.scalar_one_or_none():
+    except enrollment_service.ClassFullError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Student already enrolled in this class"
-        )
-    
-    # Check class capacity
-    active_enrollments = await db.execute(
-        select(Enrollment).where(
-            and_(
-                Enrollment.class_id == class_id,
-                Enrollment.status == "active"
-            )
+            detail="Class is at maximum capacity"
         )
-    )
-    enrollment_count = len(active_enrollments.scalars().all())
-    
-    if enrollment_count >= dance_class.max_capacity:
+    except enrollment_service.AlreadyEnrolledError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Class is at maximum capacity"
+            detail="Student already enrolled in this class"
         )
     
-    # Create enrollment
-    new_enrollment = Enrollment(
-        student_id=student_id,
-        class_id=class_id,
-        enrollment_date=date.today(),
-        status="active"
-    )
-    
-    db.add(new_enrollment)
     await db.commit()
+    await invalidation_bus.publish(EnrollmentChanged(parent_id=str(student.parent_id), class_id=class_id))
     
-    return {"message": "Student enrolled successfully"}
+    if enrollment_status == enrollment_service.WAITLISTED:
+        return {"message": "Class is full, student added to the waitlist", "status": enrollment_status}
+    return {"message": "Student enrolled successfully", "status": enrollment_status}
 
 @router.delete("/{class_id}/enroll/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def drop_class(
@@ -179,15 +301,17 @@ async def drop_class(
                 detail="Not authorized to drop this student"
             )
     
-    # Get enrollment
+    # Lock the class before the enrollment, the order every seat change uses
+    await enrollment_service.lock_class(db, class_id)
     enrollment_result = await db.execute(
         select(Enrollment).where(
             and_(
                 Enrollment.student_id == student_id,
                 Enrollment.class_id == class_id,
-                Enrollment.status == "active"
+                Enrollment.status.in_([enrollment_service.ACTIVE, enrollment_service.WAITLISTED])
             )
         )
+        .with_for_update()
     )
     enrollment = enrollment_result.scalar_one_or_none()
     
@@ -197,46 +321,10 @@ async def drop_class(
             detail="Active enrollment not found"
         )
     
-    # Update enrollment status
-    enrollment.status = "dropped"
-    enrollment.drop_date = date.today()
+    # Drop and release the seat (or pass it to the waitlist)
+    promoted_parent_id = await enrollment_service.drop(db, enrollment)
     
     await db.commit()
-
-@router.get("/schedule", response_model=List[dict])
-async def get_schedule(
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get class schedule (public view)"""
-    query = (
-        select(DanceClass, DanceStyle, ClassLevel, Instructor, User)
-        .join(DanceStyle, DanceClass.style_id == DanceStyle.id, isouter=True)
-        .join(ClassLevel, DanceClass.level_id == ClassLevel.id, isouter=True)
-        .join(Instructor, DanceClass.instructor_id == Instructor.id, isouter=True)
-        .join(User, Instructor.user_id == User.id, isouter=True)
-        .where(DanceClass.is_active == True)
-        .order_by(DanceClass.day_of_week, DanceClass.start_time)
-    )
-    
-    result = await db.execute(query)
-    rows = result.all()
-    
-    schedule = []
-    for dance_class, style, level, instructor, user in rows:
-        schedule.append({
-            "id": str(dance_class.id),
-            "name": dance_class.name,
-            "description": dance_class.description,
-            "style": style.name if style else None,
-            "level": level.name if level else None,
-            "instructor": f"{user.first_name} {user.last_name}" if user else None,
-            "day_of_week": dance_class.day_of_week,
-            "start_time": str(dance_class.start_time),
-            "end_time": str(dance_class.end_time),
-            "studio_room": dance_class.studio_room,
-            "monthly_tuition": float(dance_class.monthly_tuition),
-            "max_capacity": dance_class.max_capacity
-        })
-    
-    return schedule
+    await invalidation_bus.publish(EnrollmentChanged(parent_id=str(student.parent_id), class_id=class_id))
+    if promoted_parent_id is not None and promoted_parent_id != student.parent_id:
+        await invalidation_bus.publish(EnrollmentChanged(parent_id=str(promoted_parent_id), class_id=class_id))
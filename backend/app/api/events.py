@@ -1,14 +1,19 @@
 """Events and competitions routes"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
 from typing import List, Optional
 from datetime import date, datetime
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.models import Event, EventParticipant, Student, Parent, User
-from app.schemas.schemas import EventResponse, EventCreate
+from app.schemas.schemas import (
+    EventResponse, EventCreate, BatchRegistrationRequest, BatchRegistrationResponse
+)
 from app.auth import get_current_active_user, check_role
+from app.services.invalidation import invalidation_bus, AccountChanged, EventChanged, RegistrationChanged
+from app.services import event_registration
+from app.services.exports import export_response
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -17,7 +22,7 @@ async def list_events(
     event_type: Optional[str] = None,
     upcoming_only: bool = False,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all events with optional filters"""
     query = select(Event).where(Event.is_active == True)
@@ -52,6 +57,69 @@ async def get_event(
     
     return event
 
+@router.post("/{event_id}/register", response_model=BatchRegistrationResponse)
+async def register_batch(
+    event_id: str,
+    request: BatchRegistrationRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Register a group of students for an event and charge entry fees in one commit"""
+    parent_id = None
+    if current_user.role == "parent":
+        parent_result = await db.execute(
+            select(Parent.id).where(Parent.user_id == current_user.id)
+        )
+        parent_id = parent_result.scalar_one_or_none()
+        if parent_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to register students"
+            )
+
+    try:
+        summary = await event_registration.register_batch(
+            db, event_id, request.student_ids,
+            parent_id=parent_id, created_by=current_user.id, notes=request.notes
+        )
+    except event_registration.EventNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    except event_registration.RegistrationClosedError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Registration deadline has passed"
+        )
+
+    results = summary["results"]
+    rejected = sum(1 for result in results if result["status"] == event_registration.REJECTED)
+    committed = summary["registered"] > 0 and not (request.atomic and rejected)
+    response = BatchRegistrationResponse(
+        committed=committed,
+        registered=summary["registered"] if committed else 0,
+        rejected=rejected,
+        accounts_charged=summary["accounts_charged"] if committed else 0,
+        amount_charged=float(summary["amount_charged"]) if committed else 0.0,
+        results=results
+    )
+
+    if not committed:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=response.model_dump(mode="json")
+        )
+
+    await db.commit()
+    families = {result["parent_id"] for result in results if result["status"] == event_registration.REGISTERED}
+    family = str(families.pop()) if len(families) == 1 else None
+    await invalidation_bus.publish(RegistrationChanged(parent_id=family, event_id=event_id))
+    if summary["accounts_charged"]:
+        await invalidation_bus.publish(AccountChanged(parent_id=family))
+    return response
+
 @router.post("/{event_id}/register/{student_id}", status_code=status.HTTP_201_CREATED)
 async def register_for_event(
     event_id: str,
@@ -127,17 +195,38 @@ async def register_for_event(
     
     db.add(new_participant)
     await db.commit()
+    await invalidation_bus.publish(RegistrationChanged(parent_id=str(student.parent_id), event_id=event_id))
     
     return {"message": "Student registered for event successfully"}
 
-@router.get("/{event_id}/participants", response_model=List[dict])
-async def get_event_participants(
-    event_id: str,
-    current_user: User = Depends(check_role(["owner", "admin", "instructor", "finance"])),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get all participants for an event (staff only)"""
-    # Verify event exists
+PARTICIPANT_COLUMNS = [
+    "participant_id", "student_id", "student_name", "parent_name",
+    "parent_email", "registration_date", "fee_paid", "notes"
+]
+
+
+def _participants_query(event_id: str):
+    """Participant rows as plain columns, in PARTICIPANT_COLUMNS order"""
+    return (
+        select(
+            EventParticipant.id,
+            Student.id,
+            func.concat(Student.first_name, " ", Student.last_name),
+            func.concat(User.first_name, " ", User.last_name),
+            User.email,
+            EventParticipant.registration_date,
+            EventParticipant.fee_paid,
+            EventParticipant.notes
+        )
+        .join(Student, EventParticipant.student_id == Student.id)
+        .join(Parent, Student.parent_id == Parent.id)
+        .join(User, Parent.user_id == User.id)
+        .where(EventParticipant.event_id == event_id)
+        .order_by(Student.last_name, Student.first_name, EventParticipant.id)
+    )
+
+
+async def _get_event_or_404(db: AsyncSession, event_id: str) -> Event:
     event_result = await db.execute(select(Event).where(Event.id == event_id))
     event = event_result.scalar_one_or_none()
     
@@ -146,34 +235,46 @@ async def get_event_participants(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
+    return event
+
+@router.get("/{event_id}/participants", response_model=List[dict])
+async def get_event_participants(
+    event_id: str,
+    current_user: User = Depends(check_role(["owner", "admin", "instructor", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get all participants for an event (staff only)"""
+    await _get_event_or_404(db, event_id)
     
-    # Get participants with student info
-    query = (
-        select(EventParticipant, Student, Parent, User)
-        .join(Student, EventParticipant.student_id == Student.id)
-        .join(Parent, Student.parent_id == Parent.id)
-        .join(User, Parent.user_id == User.id)
-        .where(EventParticipant.event_id == event_id)
-        .order_by(Student.last_name, Student.first_name)
-    )
+    result = await db.execute(_participants_query(event_id))
     
-    result = await db.execute(query)
-    rows = result.all()
-    
-    participants = []
-    for participant, student, parent, user in rows:
-        participants.append({
-            "participant_id": str(participant.id),
-            "student_id": str(student.id),
-            "student_name": f"{student.first_name} {student.last_name}",
-            "parent_name": f"{user.first_name} {user.last_name}",
-            "parent_email": user.email,
-            "registration_date": participant.registration_date.isoformat(),
-            "fee_paid": participant.fee_paid,
-            "notes": participant.notes
-        })
-    
-    return participants
+    return [
+        {
+            "participant_id": str(participant_id),
+            "student_id": str(student_id),
+            "student_name": student_name,
+            "parent_name": parent_name,
+            "parent_email": parent_email,
+            "registration_date": registration_date.isoformat() if registration_date else None,
+            "fee_paid": fee_paid,
+            "notes": notes
+        }
+        for participant_id, student_id, student_name, parent_name, parent_email,
+            registration_date, fee_paid, notes in result.all()
+    ]
+
+@router.get("/{event_id}/participants/export")
+async def export_event_participants(
+    event_id: str,
+    fmt: str = Query("csv", alias="format"),
+    current_user: User = Depends(check_role(["owner", "admin", "instructor", "finance"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream the participant list as CSV or NDJSON (staff only)"""
+    await _get_event_or_404(db, event_id)
+    return export_response(
+        _participants_query(event_id), PARTICIPANT_COLUMNS, fmt, f"event-{event_id}-participants"
+    )
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_event(
@@ -186,6 +287,7 @@ async def create_event(
     db.add(new_event)
     await db.commit()
     await db.refresh(new_event)
+    await invalidation_bus.publish(EventChanged(event_id=str(new_event.id)))
     
     return {"id": str(new_event.id), "message": "Event created successfully"}
 
@@ -211,6 +313,7 @@ async def update_event(
         setattr(event, key, value)
     
     await db.commit()
+    await invalidation_bus.publish(EventChanged(event_id=event_id))
     await db.refresh(event)
     
     return event
@@ -233,3 +336,4 @@ async def delete_event(
     
     event.is_active = False
     await db.commit()
+    await invalidation_bus.publish(EventChanged(event_id=event_id))
@@ -0,0 +1,125 @@
+"""Prometheus metrics endpoint"""
+from fastapi import APIRouter, Response
+
+from app.auth import principal_cache, password_pool_stats
+from app.database import engine, replica_engine, pool_telemetry, replica_telemetry
+from app.services.aging_report import aging_report_cache
+from app.services.announcement_feed import announcement_feed_cache
+from app.services.chat_log_writer import chat_log_writer
+from app.services.context_cache import chat_context_cache
+from app.services.gemini_service import gemini_service
+from app.services.invalidation import invalidation_bus
+from app.services.metrics import MetricsWriter, request_metrics
+from app.services.schedule_cache import schedule_cache
+
+router = APIRouter(tags=["metrics"])
+
+PREFIX = "studio4"
+
+
+def _write_requests(out: MetricsWriter) -> None:
+    out.metric(f"{PREFIX}_http_requests_in_flight", "gauge", "HTTP requests currently being served")
+    out.sample(f"{PREFIX}_http_requests_in_flight", request_metrics.in_flight)
+
+    out.metric(f"{PREFIX}_http_request_duration_seconds", "histogram", "HTTP request latency by route")
+    for (method, route), histogram in sorted(request_metrics.latency.items()):
+        out.histogram(f"{PREFIX}_http_request_duration_seconds", histogram, method=method, route=route)
+
+    out.metric(f"{PREFIX}_http_responses_total", "counter", "HTTP responses by route and status")
+    for (method, route, status_code), count in sorted(request_metrics.responses.items()):
+        out.sample(f"{PREFIX}_http_responses_total", count, method=method, route=route, status=status_code)
+
+
+def _write_pools(out: MetricsWriter) -> None:
+    pools = [("primary", engine, pool_telemetry)]
+    if replica_engine is not None:
+        pools.append(("replica", replica_engine, replica_telemetry))
+
+    gauges = [
+        ("size", "Configured pool size", lambda pool: pool.size()),
+        ("checked_out", "Connections currently checked out", lambda pool: pool.checkedout()),
+        ("checked_in", "Idle connections in the pool", lambda pool: pool.checkedin()),
+        ("overflow", "Connections open beyond pool_size", lambda pool: max(pool.overflow(), 0)),
+    ]
+    for suffix, help_text, read in gauges:
+        out.metric(f"{PREFIX}_db_pool_{suffix}", "gauge", help_text)
+        for name, db_engine, _ in pools:
+            out.sample(f"{PREFIX}_db_pool_{suffix}", read(db_engine.pool), pool=name)
+
+    out.metric(f"{PREFIX}_db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a connection")
+    for name, _, telemetry in pools:
+        out.sample(f"{PREFIX}_db_pool_timeouts_total", telemetry.timeouts, pool=name)
+
+    out.metric(f"{PREFIX}_db_pool_wait_seconds", "histogram", "Time spent waiting to check out a connection")
+    for name, _, telemetry in pools:
+        out.histogram(f"{PREFIX}_db_pool_wait_seconds", telemetry.wait_seconds, pool=name)
+
+
+def _write_gemini(out: MetricsWriter) -> None:
+    out.metric(f"{PREFIX}_gemini_calls_total", "counter", "Gemini API calls")
+    out.sample(f"{PREFIX}_gemini_calls_total", gemini_service.calls)
+    out.metric(f"{PREFIX}_gemini_errors_total", "counter", "Gemini API calls that failed")
+    out.sample(f"{PREFIX}_gemini_errors_total", gemini_service.errors)
+    out.metric(f"{PREFIX}_gemini_call_duration_seconds", "histogram", "Gemini API call latency")
+    out.histogram(f"{PREFIX}_gemini_call_duration_seconds", gemini_service.latency)
+
+
+async def _write_chat(out: MetricsWriter) -> None:
+    sessions = await gemini_service.sessions.live_stats()
+    if "live_sessions" in sessions:
+        out.metric(f"{PREFIX}_chat_sessions", "gauge", "Live chat sessions (per worker for memory, shared for database)")
+        out.sample(f"{PREFIX}_chat_sessions", sessions["live_sessions"], backend=sessions["backend"])
+        out.metric(f"{PREFIX}_chat_session_bytes", "gauge", "Approximate memory used by chat sessions")
+        out.sample(f"{PREFIX}_chat_session_bytes", sessions["memory_bytes"], backend=sessions["backend"])
+    out.metric(f"{PREFIX}_chat_session_evictions_total", "counter", "Chat sessions evicted or expired")
+    out.sample(f"{PREFIX}_chat_session_evictions_total", sessions["evictions"], reason="capacity")
+    out.sample(f"{PREFIX}_chat_session_evictions_total", sessions["expirations"], reason="idle")
+
+    writer = chat_log_writer.stats()
+    out.metric(f"{PREFIX}_chat_log_queued", "gauge", "Chat log rows waiting to be written")
+    out.sample(f"{PREFIX}_chat_log_queued", writer["queued"])
+    out.metric(f"{PREFIX}_chat_log_rows_total", "counter", "Chat log rows by outcome")
+    for outcome in ("flushed", "dropped", "failed"):
+        out.sample(f"{PREFIX}_chat_log_rows_total", writer[outcome], outcome=outcome)
+
+    passwords = password_pool_stats()
+    out.metric(f"{PREFIX}_password_jobs_pending", "gauge", "Password hash/verify jobs queued or running")
+    out.sample(f"{PREFIX}_password_jobs_pending", passwords["pending"])
+
+
+def _write_caches(out: MetricsWriter) -> None:
+    caches = [
+        ("principal", principal_cache.stats()),
+        ("chat_context", chat_context_cache.stats()),
+        ("schedule", schedule_cache.stats()),
+        ("aging_report", aging_report_cache.stats()),
+        ("announcements", announcement_feed_cache.stats()),
+    ]
+    out.metric(f"{PREFIX}_cache_hits_total", "counter", "Cache lookups served from the cache")
+    for name, stats in caches:
+        out.sample(f"{PREFIX}_cache_hits_total", stats["hits"], cache=name)
+    out.metric(f"{PREFIX}_cache_misses_total", "counter", "Cache lookups that had to rebuild")
+    for name, stats in caches:
+        out.sample(f"{PREFIX}_cache_misses_total", stats.get("misses", stats.get("rebuilds", 0)), cache=name)
+    out.metric(f"{PREFIX}_cache_hit_ratio", "gauge", "Hits over lookups since start")
+    for name, stats in caches:
+        out.sample(f"{PREFIX}_cache_hit_ratio", round(stats["hit_ratio"], 4), cache=name)
+
+    bus = invalidation_bus.stats()
+    out.metric(f"{PREFIX}_invalidation_events_total", "counter", "Cache invalidation events by origin")
+    out.sample(f"{PREFIX}_invalidation_events_total", bus["published"], origin="local")
+    out.sample(f"{PREFIX}_invalidation_events_total", bus["received"], origin="remote")
+    out.metric(f"{PREFIX}_invalidation_pending", "gauge", "Events waiting to be re-sent to other workers")
+    out.sample(f"{PREFIX}_invalidation_pending", bus["pending"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition for this worker"""
+    out = MetricsWriter()
+    _write_requests(out)
+    _write_pools(out)
+    _write_gemini(out)
+    await _write_chat(out)
+    _write_caches(out)
+    return Response(content=out.render(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,15 @@
 """User management routes"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.models.models import User, Parent
 from app.schemas.schemas import UserResponse, UserBase
 from app.auth import get_current_active_user, check_role
+from app.services.invalidation import invalidation_bus, UserChanged
+from app.services.pagination import paginate_newest_first, set_next_cursor
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -25,6 +27,8 @@ async def update_current_user_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Update current user profile"""
+    previous_email = current_user.email
+    
     # Update user fields
     await db.execute(
         update(User)
@@ -37,6 +41,9 @@ async def update_current_user_profile(
         )
     )
     await db.commit()
+    await invalidation_bus.publish(
+        UserChanged(user_id=str(current_user.id), email=previous_email, role=current_user.role)
+    )
     
     # Refresh and return updated user
     await db.refresh(current_user)
@@ -44,19 +51,19 @@ async def update_current_user_profile(
 
 @router.get("/", response_model=List[UserResponse])
 async def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(check_role(["owner", "admin"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all users (admin/owner only)"""
+    """List all users (admin/owner only), newest first; page with the X-Next-Cursor header"""
     result = await db.execute(
-        select(User)
-        .offset(skip)
-        .limit(limit)
-        .order_by(User.created_at.desc())
+        paginate_newest_first(select(User), User, cursor, skip, limit)
     )
     users = result.scalars().all()
+    set_next_cursor(response, users, limit)
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -100,3 +107,4 @@ async def deactivate_user(
         .values(is_active=False)
     )
     await db.commit()
+    await invalidation_bus.publish(UserChanged(user_id=str(user.id), email=user.email, role=user.role))
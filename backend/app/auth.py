@@ -1,4 +1,6 @@
 """Authentication utilities for JWT tokens and password hashing"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,22 +8,71 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, inspect
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.config import get_settings
 from app.database import get_db
 from app.models.models import User
+from app.services.cache import TTLCache
+from app.services.invalidation import invalidation_bus, TransportReconnected, UserChanged
 
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Authenticated principals keyed by token subject (email). Entries are
+# detached snapshots; writes to a user row must publish UserChanged.
+principal_cache = TTLCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    name="principal"
+)
+
+# bcrypt is CPU-bound (~250ms per call); keep it off the event loop on a
+# small dedicated pool and shed load once too many calls are waiting.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+_pending_password_jobs = 0
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    global _pending_password_jobs
+    if _pending_password_jobs >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending_password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _pending_password_jobs -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool (503 when saturated)"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool (503 when saturated)"""
+    return await _run_password_job(get_password_hash, password)
+
+def password_pool_stats() -> dict:
+    return {
+        "workers": settings.password_hash_workers,
+        "pending": _pending_password_jobs,
+        "max_pending": settings.password_hash_max_pending
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -49,12 +100,37 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    cached = principal_cache.get(email)
+    if cached is not None:
+        # Attach a private copy to this request's session without a SELECT
+        return await db.merge(cached, load=False)
+
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
+    principal_cache.set(email, _principal_snapshot(user))
     return user
 
+def _principal_snapshot(user: User) -> User:
+    """Copy a loaded user's column state into a detached instance for caching"""
+    snapshot = User(**{
+        attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+    })
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+def invalidate_principal(email: str) -> None:
+    """Drop a cached principal after its user row changes"""
+    principal_cache.invalidate(email)
+
+def _on_user_change(event: UserChanged) -> None:
+    if event.email:
+        invalidate_principal(event.email)
+
+invalidation_bus.subscribe(UserChanged, _on_user_change)
+invalidation_bus.subscribe(TransportReconnected, lambda event: principal_cache.clear())
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -1,18 +1,72 @@
 """Database connection and session management"""
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import get_settings
+from app.services.metrics import Histogram
+from app.services.db_instrumentation import instrument_engine
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+READ_YOUR_WRITES_COOKIE = "studio4_rw"
+
+
+class PoolTelemetry:
+    """Connection acquisition wait times and timeouts for one engine pool"""
+
+    def __init__(self):
+        self.wait_seconds = Histogram()
+        self.timeouts = 0
+
+
+def instrumented_pool(telemetry: PoolTelemetry) -> type:
+    """Queue pool class that records how long each checkout waited for a connection"""
+
+    class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                telemetry.timeouts += 1
+                raise
+            finally:
+                telemetry.wait_seconds.observe(time.perf_counter() - started)
+
+    return InstrumentedQueuePool
+
+
+def _create_engine(url: str, telemetry: PoolTelemetry):
+    return create_async_engine(
+        url,
+        echo=settings.debug,
+        poolclass=instrumented_pool(telemetry),
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds
+    )
+
+
+pool_telemetry = PoolTelemetry()
+engine = _create_engine(settings.database_url, pool_telemetry)
+
+replica_telemetry = PoolTelemetry()
+replica_engine = (
+    _create_engine(settings.database_replica_url, replica_telemetry)
+    if settings.database_replica_url else None
 )
 
+if settings.db_instrumentation:
+    for instrumented in (engine, replica_engine):
+        if instrumented is not None:
+            instrument_engine(instrumented, settings.db_slow_query_ms)
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -21,6 +75,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+# Falls back to the primary when no replica is configured
+ReadSessionLocal = async_sessionmaker(
+    replica_engine or engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
 class Base(DeclarativeBase):
     pass
 
@@ -32,7 +95,52 @@ async def get_db():
         finally:
             await session.close()
 
+def wrote_recently(request: Request) -> bool:
+    """Whether this client made a write within the read-your-writes window"""
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def mark_write(response: Response) -> None:
+    """Pin the client's reads to the primary until the replica has caught up"""
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        str(int(time.time()) + settings.read_your_writes_seconds),
+        max_age=settings.read_your_writes_seconds,
+        httponly=True,
+        samesite="lax"
+    )
+
+async def get_read_db(request: Request):
+    """Dependency for read-only routes: the replica, or the primary just after this client wrote"""
+    sessionmaker = AsyncSessionLocal if wrote_recently(request) else ReadSessionLocal
+    async with sessionmaker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+def _engine_pool_stats(db_engine, telemetry: PoolTelemetry) -> dict:
+    pool = db_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.db_max_overflow,
+        "timeouts": telemetry.timeouts,
+        "wait_seconds": telemetry.wait_seconds.snapshot()
+    }
+
+def pool_stats() -> dict:
+    """Live pool occupancy plus checkout wait histogram (replica under "replica")"""
+    stats = _engine_pool_stats(engine, pool_telemetry)
+    if replica_engine is not None:
+        stats["replica"] = _engine_pool_stats(replica_engine, replica_telemetry)
+    return stats
@@ -1,11 +1,19 @@
 """Studio4 Dance Co - Main FastAPI Application"""
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.config import get_settings
-from app.database import init_db
-from app.api import auth, users, classes, events, billing, chat, dashboard
+from app.database import init_db, pool_stats, replica_engine, mark_write
+from app.auth import password_executor
+from app.services.gemini_service import gemini_service
+from app.services.chat_log_writer import chat_log_writer
+from app.services.ledger_service import run_reconciliation_loop
+from app.services.invalidation import invalidation_bus
+from app.services import db_instrumentation
+from app.api import auth, users, classes, events, billing, chat, dashboard, metrics
+from app.services.metrics import MetricsMiddleware
 
 settings = get_settings()
 
@@ -14,9 +22,24 @@ async def lifespan(app: FastAPI):
     # Startup
     await init_db()
     print("Database initialized!")
+    chat_log_writer.start()
+    gemini_service.sessions.start()
+    await invalidation_bus.start()
+    reconcile_task = None
+    if settings.balance_reconcile_interval_seconds > 0:
+        reconcile_task = asyncio.create_task(
+            run_reconciliation_loop(settings.balance_reconcile_interval_seconds)
+        )
     yield
     # Shutdown
     print("Shutting down...")
+    if reconcile_task:
+        reconcile_task.cancel()
+    await invalidation_bus.stop()
+    await chat_log_writer.stop()
+    await gemini_service.sessions.stop()
+    password_executor.shutdown(wait=False)
+    await gemini_service.aclose()
 
 app = FastAPI(
     title=settings.app_name,
@@ -31,8 +54,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Queries", "X-DB-Time-Ms", "X-DB-Slowest-Ms"],
 )
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a successful write, keep this client's reads on the primary for a few seconds"""
+    response = await call_next(request)
+    if replica_engine is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+        mark_write(response)
+    return response
+
+if settings.db_instrumentation:
+    @app.middleware("http")
+    async def db_query_stats(request: Request, call_next):
+        """Report this request's query count, DB time and slowest statement"""
+        stats = db_instrumentation.start_request()
+        response = await call_next(request)
+        response.headers.update(stats.headers())
+        db_instrumentation.log_request(request.method, request.url.path, response.status_code, stats)
+        return response
+
 # Include API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -42,6 +86,11 @@ app.include_router(billing.router, prefix="/api/billing", tags=["Billing"])
 app.include_router(chat.router, prefix="/api/chat", tags=["AI Chat"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 
+if settings.metrics_enabled:
+    # Outermost, so latency covers the other middleware as well
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
 @app.get("/")
 async def root():
     return {
@@ -53,3 +102,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/pool")
+async def pool_health():
+    """Database pool occupancy, checkout waits and timeouts for this worker"""
+    return pool_stats()
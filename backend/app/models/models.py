@@ -1,6 +1,6 @@
 """SQLAlchemy models for Studio4 database"""
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Integer, DECIMAL, Date, Time, ARRAY
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Integer, DECIMAL, Date, Time, ARRAY, UniqueConstraint, Index, and_
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY as PG_ARRAY, ENUM
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -22,6 +22,9 @@ class User(Base):
     last_login = Column(DateTime(timezone=True))
     parent_profile = relationship("Parent", back_populates="user", uselist=False)
     instructor_profile = relationship("Instructor", back_populates="user", uselist=False)
+    __table_args__ = (
+        Index("idx_users_created_id", created_at.desc(), id.desc()),
+    )
 
 class Parent(Base):
     __tablename__ = "parents"
@@ -102,6 +105,7 @@ class DanceClass(Base):
     end_time = Column(Time)
     studio_room = Column(String(50))
     max_capacity = Column(Integer, default=20)
+    enrolled_count = Column(Integer, nullable=False, default=0)
     monthly_tuition = Column(DECIMAL(10, 2), default=0.00)
     is_active = Column(Boolean, default=True)
     start_date = Column(Date)
@@ -111,6 +115,9 @@ class DanceClass(Base):
     level = relationship("ClassLevel", back_populates="classes")
     instructor = relationship("Instructor", back_populates="classes")
     enrollments = relationship("Enrollment", back_populates="dance_class", cascade="all, delete-orphan")
+    __table_args__ = (
+        Index("idx_classes_active_schedule", day_of_week, start_time, postgresql_where=(is_active == True)),
+    )
 
 
 class Enrollment(Base):
@@ -124,6 +131,13 @@ class Enrollment(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     student = relationship("Student", back_populates="enrollments")
     dance_class = relationship("DanceClass", back_populates="enrollments")
+    __table_args__ = (
+        UniqueConstraint("student_id", "class_id"),
+        Index("idx_enrollments_class_active", class_id, postgresql_where=(status == "active")),
+        Index("idx_enrollments_class_waitlisted", class_id, enrollment_date, created_at,
+              postgresql_where=(status == "waitlisted")),
+        Index("idx_enrollments_student_status", student_id, status),
+    )
 
 class Event(Base):
     __tablename__ = "events"
@@ -141,6 +155,9 @@ class Event(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     participants = relationship("EventParticipant", back_populates="event", cascade="all, delete-orphan")
+    __table_args__ = (
+        Index("idx_events_active_start", start_date, postgresql_where=(is_active == True)),
+    )
 
 class EventParticipant(Base):
     __tablename__ = "event_participants"
@@ -151,15 +168,26 @@ class EventParticipant(Base):
     fee_paid = Column(Boolean, default=False)
     notes = Column(Text)
     event = relationship("Event", back_populates="participants")
+    __table_args__ = (
+        Index("idx_event_participants_event_student", event_id, student_id, unique=True),
+        Index("idx_event_participants_student", student_id),
+    )
 
 class Account(Base):
     __tablename__ = "accounts"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     parent_id = Column(UUID(as_uuid=True), ForeignKey("parents.id", ondelete="CASCADE"), unique=True)
     current_balance = Column(DECIMAL(10, 2), default=0.00)
+    total_charges = Column(DECIMAL(12, 2), nullable=False, default=0)
+    total_payments = Column(DECIMAL(12, 2), nullable=False, default=0)
+    total_credits = Column(DECIMAL(12, 2), nullable=False, default=0)
+    last_activity_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     parent = relationship("Parent", back_populates="account")
+    __table_args__ = (
+        Index("idx_accounts_balance", current_balance.desc()),
+    )
     transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
 
 class Transaction(Base):
@@ -177,7 +205,25 @@ class Transaction(Base):
     paid_date = Column(Date)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    idempotency_key = Column(String(100), unique=True)
     account = relationship("Account", back_populates="transactions")
+    __table_args__ = (
+        Index("idx_transactions_created_id", created_at.desc(), id.desc()),
+        Index("idx_transactions_account_created_id", account_id, created_at.desc(), id.desc()),
+    )
+
+class BillingRun(Base):
+    __tablename__ = "billing_runs"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    period = Column(Date, unique=True, nullable=False)
+    status = Column(String(20), nullable=False, default="running")
+    last_account_id = Column(UUID(as_uuid=True))
+    accounts_billed = Column(Integer, nullable=False, default=0)
+    charges_created = Column(Integer, nullable=False, default=0)
+    amount_billed = Column(DECIMAL(12, 2), nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    completed_at = Column(DateTime(timezone=True))
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
 
 class BlogPost(Base):
     __tablename__ = "blog_posts"
@@ -221,12 +267,19 @@ class Announcement(Base):
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
-    target_roles = Column(ARRAY(String))
+    # Matches schema.sql's user_role[], so @> binds are cast to the same type
+    target_roles = Column(PG_ARRAY(ENUM("owner", "finance", "instructor", "parent", "student", name="user_role")))
     is_pinned = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     publish_date = Column(Date, default=datetime.utcnow().date)
     expire_date = Column(Date)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    __table_args__ = (
+        Index("idx_announcements_target_roles", target_roles,
+              postgresql_using="gin", postgresql_where=(is_active == True)),
+        Index("idx_announcements_everyone", publish_date,
+              postgresql_where=and_(is_active == True, target_roles.is_(None))),
+    )
 
 class Message(Base):
     __tablename__ = "messages"
@@ -248,3 +301,13 @@ class ChatLog(Base):
     response = Column(Text)
     is_authenticated = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    __table_args__ = (
+        Index("idx_chat_logs_user_created_id", user_id, created_at.desc(), id.desc()),
+    )
+
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+    session_id = Column(String(64), primary_key=True)
+    history = Column(JSONB, nullable=False, default=list)
+    size_bytes = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
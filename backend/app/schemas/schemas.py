@@ -100,10 +100,39 @@ class DanceClassResponse(DanceClassBase):
     instructor_id: Optional[UUID]
     is_active: bool
     created_at: datetime
+    enrolled_count: int = 0
+    seats_remaining: int = 0
+    waitlist_count: int = 0
 
     class Config:
         from_attributes = True
 
+class EnrollmentPair(BaseModel):
+    student_id: UUID
+    class_id: UUID
+
+class BatchEnrollmentRequest(BaseModel):
+    enrollments: List[EnrollmentPair] = Field(..., min_length=1, max_length=100)
+    waitlist: bool = False
+    atomic: bool = Field(True, description=(
+        "True: if any pair is rejected nothing is enrolled and the per-pair results come back as a 400. "
+        "False: the accepted pairs are committed and the rejected ones reported."
+    ))
+
+class EnrollmentResult(BaseModel):
+    student_id: UUID
+    class_id: UUID
+    parent_id: Optional[UUID] = None
+    status: str
+    error: Optional[str] = None
+
+class BatchEnrollmentResponse(BaseModel):
+    committed: bool
+    enrolled: int
+    waitlisted: int
+    rejected: int
+    results: List[EnrollmentResult]
+
 # Event Schemas
 class EventBase(BaseModel):
     title: str
@@ -128,6 +157,28 @@ class EventResponse(EventBase):
     class Config:
         from_attributes = True
 
+class BatchRegistrationRequest(BaseModel):
+    student_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+    notes: Optional[str] = None
+    atomic: bool = Field(True, description=(
+        "True: if any student is rejected nothing is registered or charged and the per-student results "
+        "come back as a 400. False: the accepted students are registered and charged."
+    ))
+
+class RegistrationResult(BaseModel):
+    student_id: UUID
+    parent_id: Optional[UUID] = None
+    status: str
+    error: Optional[str] = None
+
+class BatchRegistrationResponse(BaseModel):
+    committed: bool
+    registered: int
+    rejected: int
+    accounts_charged: int
+    amount_charged: float
+    results: List[RegistrationResult]
+
 # Transaction Schemas
 class TransactionBase(BaseModel):
     amount: float
@@ -161,6 +212,35 @@ class AccountResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AccountSummaryResponse(BaseModel):
+    """Balance and running totals of a family account, over completed transactions"""
+    account_id: str
+    current_balance: float
+    total_charges: float = Field(..., description=(
+        "Every positive non-payment transaction: tuition, entry fees, costumes, late fees and other "
+        "charges. Before the running totals existed this counted only transactions of type 'charge'."
+    ))
+    total_payments: float = Field(..., description="Payments received (type 'payment'), as a positive amount")
+    total_credits: float = Field(..., description=(
+        "Credits, refunds and other negative non-payment transactions, as a positive amount"
+    ))
+    last_activity_at: Optional[str] = None
+    status: str  # due, credit or balanced
+
+class FamilyAccountSummaryResponse(AccountSummaryResponse):
+    parent_id: str
+    parent_name: str
+    email: str
+
+# Announcement Schemas
+class AnnouncementCreate(BaseModel):
+    title: str
+    content: str
+    target_roles: Optional[List[str]] = None  # None or [] = everyone
+    is_pinned: bool = False
+    publish_date: Optional[date] = None
+    expire_date: Optional[date] = None
+
 class DashboardResponse(BaseModel):
     """Parent dashboard response with all relevant data"""
     user: UserResponse
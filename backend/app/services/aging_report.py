@@ -0,0 +1,156 @@
+"""Accounts receivable aging report"""
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func, literal, cast, Date
+
+from app.config import get_settings
+from app.models.models import Account, Parent, Transaction, User
+from app.services.cache import TTLCache
+from app.services.invalidation import invalidation_bus, AccountChanged, TransportReconnected
+from app.services.ledger_service import is_payment
+
+BUCKETS = ("current", "days_30", "days_60", "days_90_plus")
+
+CSV_HEADER = ["account_id", "parent_name", "email", *BUCKETS, "total_due"]
+
+
+async def build_aging_report(db: AsyncSession, as_of: date) -> list:
+    """Age every outstanding balance, as it stood at the end of as_of, by how
+    far past due_date its charges are.
+
+    Only transactions created by the end of as_of (UTC) count, and the
+    balance is the ledger sum over them rather than the live current_balance,
+    so a past date reports what was owed then. Payments and credits are
+    applied to the oldest charges first, so the amount still owed is made up
+    of the newest charges: a running total of charges from newest to oldest
+    (one window pass over the account's charges) tells how much of each
+    charge is still open. Buckets are current (under 30 days past due,
+    including not yet due), 30-59, 60-89 and 90+ days. Charges without a
+    due_date age from their creation date.
+    """
+    cutoff = datetime.combine(as_of + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    posted = and_(Transaction.status == "completed", Transaction.created_at < cutoff)
+    balances = (
+        select(Transaction.account_id, func.sum(Transaction.amount).label("balance"))
+        .where(posted)
+        .group_by(Transaction.account_id)
+        .subquery()
+    )
+
+    due = func.coalesce(Transaction.due_date, cast(Transaction.created_at, Date))
+    newer_total = func.sum(Transaction.amount).over(
+        partition_by=Transaction.account_id,
+        order_by=(due.desc(), Transaction.created_at.desc(), Transaction.id.desc())
+    )
+    charges = (
+        select(
+            Transaction.account_id,
+            Transaction.amount,
+            (literal(as_of, Date) - due).label("days_past_due"),
+            balances.c.balance,
+            newer_total.label("newer_total")
+        )
+        .join(balances, Transaction.account_id == balances.c.account_id)
+        .where(
+            and_(
+                balances.c.balance > 0,
+                posted,
+                ~is_payment(),
+                Transaction.amount > 0
+            )
+        )
+        .subquery()
+    )
+
+    # Part of this charge not covered by the newer charges already counted
+    open_amount = func.least(
+        charges.c.amount,
+        func.greatest(charges.c.balance - (charges.c.newer_total - charges.c.amount), 0)
+    )
+    days = charges.c.days_past_due
+
+    def bucket(condition):
+        return func.coalesce(func.sum(open_amount).filter(condition), 0)
+
+    aged = (
+        select(
+            charges.c.account_id,
+            bucket(days < 30).label("current"),
+            bucket(and_(days >= 30, days < 60)).label("days_30"),
+            bucket(and_(days >= 60, days < 90)).label("days_60"),
+            bucket(days >= 90).label("days_90_plus")
+        )
+        .group_by(charges.c.account_id)
+        .subquery()
+    )
+
+    total = aged.c.current + aged.c.days_30 + aged.c.days_60 + aged.c.days_90_plus
+    result = await db.execute(
+        select(
+            aged.c.account_id,
+            func.concat(User.first_name, " ", User.last_name),
+            User.email,
+            aged.c.current,
+            aged.c.days_30,
+            aged.c.days_60,
+            aged.c.days_90_plus,
+            total.label("total_due")
+        )
+        .join(Account, aged.c.account_id == Account.id)
+        .join(Parent, Account.parent_id == Parent.id)
+        .join(User, Parent.user_id == User.id)
+        .where(total > 0)
+        .order_by(total.desc(), aged.c.account_id)
+    )
+    return [
+        (str(account_id), name, email, *amounts)
+        for account_id, name, email, *amounts in result.all()
+    ]
+
+
+def summarize(rows: list) -> dict:
+    """Studio-wide totals per bucket"""
+    totals = {name: Decimal("0") for name in (*BUCKETS, "total_due")}
+    for row in rows:
+        for name, amount in zip(CSV_HEADER[3:], row[3:]):
+            totals[name] += amount
+    return {name: float(amount) for name, amount in totals.items()}
+
+
+def row_to_dict(row: tuple) -> dict:
+    account_id, parent_name, email, *amounts = row
+    return {
+        "account_id": account_id,
+        "parent_name": parent_name,
+        "email": email,
+        **{name: float(amount) for name, amount in zip(CSV_HEADER[3:], amounts)}
+    }
+
+
+class AgingReportCache:
+    """One report per as-of date, dropped whenever balances change"""
+
+    def __init__(self, ttl_seconds: int):
+        self._reports = TTLCache(max_entries=8, ttl_seconds=ttl_seconds, name="aging_report")
+
+    async def get(self, db: AsyncSession, as_of: date) -> list:
+        rows = self._reports.get(as_of)
+        if rows is None:
+            rows = await build_aging_report(db, as_of)
+            self._reports.set(as_of, rows)
+        return rows
+
+    def invalidate(self) -> None:
+        self._reports.clear()
+
+    def stats(self) -> dict:
+        return self._reports.stats()
+
+
+settings = get_settings()
+aging_report_cache = AgingReportCache(ttl_seconds=settings.aging_report_cache_ttl_seconds)
+
+invalidation_bus.subscribe(AccountChanged, lambda event: aging_report_cache.invalidate())
+invalidation_bus.subscribe(TransportReconnected, lambda event: aging_report_cache.invalidate())
@@ -0,0 +1,88 @@
+"""Per-role announcement feeds"""
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, or_, union_all
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.models import Announcement
+from app.services.cache import TTLCache
+from app.services.invalidation import invalidation_bus, AnnouncementChanged, TransportReconnected
+
+
+async def build_feed(db: AsyncSession, role: str, today: date) -> list:
+    """Announcements visible to a role today, pinned first then newest.
+
+    Role-targeted and everyone (NULL target_roles) announcements are
+    fetched as two UNION ALL branches, so the first is answered from the
+    GIN index on target_roles (@>) and the second from the partial index on
+    untargeted rows; an OR across both would force a full scan.
+    """
+    columns = (
+        Announcement.id,
+        Announcement.title,
+        Announcement.content,
+        Announcement.is_pinned,
+        Announcement.publish_date
+    )
+    live = and_(
+        Announcement.is_active == True,
+        or_(Announcement.publish_date.is_(None), Announcement.publish_date <= today),
+        or_(Announcement.expire_date.is_(None), Announcement.expire_date >= today)
+    )
+    feed = union_all(
+        select(*columns).where(and_(live, Announcement.target_roles.contains([role]))),
+        select(*columns).where(and_(live, Announcement.target_roles.is_(None)))
+    ).subquery()
+    result = await db.execute(
+        select(feed).order_by(feed.c.is_pinned.desc(), feed.c.publish_date.desc())
+    )
+    return [
+        {
+            "id": str(announcement_id),
+            "title": title,
+            "content": content,
+            "is_pinned": is_pinned,
+            "publish_date": publish_date.isoformat() if publish_date else None
+        }
+        for announcement_id, title, content, is_pinned, publish_date in result.all()
+    ]
+
+
+class AnnouncementFeedCache:
+    """Feeds keyed by (role, date), so publish and expiry dates roll over at midnight.
+
+    Announcement writes drop every feed; the TTL bounds staleness for rows
+    edited outside the API. Like the schedule, feeds are rebuilt from the
+    primary, and a rebuild overtaken by invalidate() is not kept.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._feeds = TTLCache(max_entries=32, ttl_seconds=ttl_seconds, name="announcements")
+        self._generation = 0
+
+    async def get(self, role: str, sessionmaker=AsyncSessionLocal) -> list:
+        key = (role, date.today())
+        feed = self._feeds.get(key)
+        if feed is None:
+            generation = self._generation
+            async with sessionmaker() as db:
+                feed = await build_feed(db, role, key[1])
+            if generation == self._generation:
+                self._feeds.set(key, feed)
+        return feed
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._feeds.clear()
+
+    def stats(self) -> dict:
+        return self._feeds.stats()
+
+
+settings = get_settings()
+announcement_feed_cache = AnnouncementFeedCache(ttl_seconds=settings.announcement_feed_ttl_seconds)
+
+invalidation_bus.subscribe(AnnouncementChanged, lambda event: announcement_feed_cache.invalidate())
+invalidation_bus.subscribe(TransportReconnected, lambda event: announcement_feed_cache.invalidate())
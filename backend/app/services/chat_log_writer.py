@@ -0,0 +1,129 @@
+"""Background writer that batches ChatLog inserts off the request path"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.models import ChatLog
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLogWriter:
+    """Buffers chat log entries and flushes them as multi-row inserts.
+
+    A flush happens when batch_size entries are waiting or flush_interval
+    seconds have passed since the first entry of the batch. When the buffer
+    is full, new entries are dropped and counted instead of blocking the chat
+    response.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop accepting entries and flush everything still buffered"""
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self.dropped += self._queue.qsize()
+            logger.error("Chat log writer did not drain in %.1fs", timeout)
+        self._task = None
+        logger.info("Chat log writer stopped: %s", self.stats())
+
+    def submit(self, user_id, session_id, message: str, response: str, is_authenticated: bool) -> bool:
+        """Queue one chat turn for logging; returns False if it was dropped"""
+        if self._queue is None or self._closing:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "session_id": session_id,
+                "message": message,
+                "response": response,
+                "is_authenticated": is_authenticated,
+                "created_at": datetime.utcnow()
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        # An idle wait is bounded too, so _run notices stop() on an empty queue
+        try:
+            batch = [await asyncio.wait_for(self._queue.get(), self.flush_interval)]
+        except asyncio.TimeoutError:
+            return []
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: list) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(ChatLog), batch)
+                await db.commit()
+        except asyncio.CancelledError:
+            # stop() timed out mid-flush: the batch is already off the queue
+            self.dropped += len(batch)
+            raise
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d chat log entries", len(batch))
+            return
+        self.flushed += len(batch)
+        self.batches += 1
+
+    async def _run(self) -> None:
+        while not (self._closing and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+
+settings = get_settings()
+chat_log_writer = ChatLogWriter(
+    batch_size=settings.chat_log_batch_size,
+    flush_interval=settings.chat_log_flush_interval_seconds,
+    max_queue=settings.chat_log_max_queue
+)
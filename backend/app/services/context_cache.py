@@ -0,0 +1,134 @@
+"""Versioned snapshots of the chat system prompt"""
+from datetime import date
+from typing import Optional
+
+from app.config import get_settings
+from app.services.cache import TTLCache
+from app.services.invalidation import (
+    invalidation_bus, AccountChanged, ClassChanged, EnrollmentChanged, EventChanged,
+    RegistrationChanged, TransportReconnected, UserChanged
+)
+
+
+class ChatContextCache:
+    """Caches rendered chat system prompts so chat turns skip the context queries.
+
+    The public prompt is shared by every visitor and carries the current
+    catalog version; class or event writes bump the version. Per-user prompts
+    are keyed by user id, remember the catalog version they were built from,
+    and are dropped when their parent's enrollments, billing or registrations
+    change. Snapshots are also tied to the day they were built because the
+    "upcoming events" list moves with the date. Callers take token() before
+    building and pass it to set_*, so a prompt built across a write is not
+    stored.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.version = 0
+        self._public: Optional[tuple] = None
+        self._users = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="chat_context")
+        self._parent_users = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="chat_context_parents")
+        # Family invalidations are numbered; remember the last one per parent/user
+        self._generation = 0
+        self._all_users_changed = 0
+        self._changed = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="chat_context_changes")
+
+    def _stamp(self) -> tuple:
+        return (self.version, date.today())
+
+    def token(self) -> tuple:
+        """Taken before building a prompt; set_* skip the store if a write happened since"""
+        return (self._stamp(), self._generation)
+
+    def _bump(self, key: Optional[str] = None) -> None:
+        self._generation += 1
+        if key is None:
+            self._all_users_changed = self._generation
+        else:
+            self._changed.set(key, self._generation)
+
+    def _changed_since(self, key: str, generation: int) -> bool:
+        return (self._changed.get(key) or 0) > generation
+
+    def get_public(self) -> Optional[str]:
+        if self._public is None or self._public[0] != self._stamp():
+            return None
+        return self._public[1]
+
+    def set_public(self, prompt: str, token: tuple) -> None:
+        stamp, _ = token
+        if stamp == self._stamp():
+            self._public = (stamp, prompt)
+
+    def get_user(self, user_id) -> Optional[str]:
+        entry = self._users.get(str(user_id))
+        if entry is None or entry[0] != self._stamp():
+            return None
+        return entry[1]
+
+    def set_user(self, user_id, prompt: str, token: tuple, parent_id=None) -> None:
+        stamp, generation = token
+        if parent_id is not None:
+            self._parent_users.set(str(parent_id), str(user_id))
+        if (
+            stamp != self._stamp()
+            or self._all_users_changed > generation
+            or self._changed_since(f"user:{user_id}", generation)
+            or (parent_id is not None and self._changed_since(f"parent:{parent_id}", generation))
+        ):
+            return
+        self._users.set(str(user_id), (stamp, prompt))
+
+    def invalidate_catalog(self) -> None:
+        """Classes or events changed: every snapshot is stale"""
+        self.version += 1
+        self._public = None
+
+    def invalidate_user(self, user_id) -> None:
+        self._bump(f"user:{user_id}")
+        self._users.invalidate(str(user_id))
+
+    def invalidate_all_users(self) -> None:
+        """Bulk writes touched many families: drop every per-user snapshot"""
+        self._bump()
+        self._users.clear()
+
+    def invalidate_parent(self, parent_id) -> None:
+        """A parent's enrollments, account or event registrations changed"""
+        self._bump(f"parent:{parent_id}")
+        user_id = self._parent_users.get(str(parent_id))
+        if user_id is not None:
+            self._users.invalidate(user_id)
+
+    def stats(self) -> dict:
+        data = self._users.stats()
+        data["version"] = self.version
+        return data
+
+
+settings = get_settings()
+chat_context_cache = ChatContextCache(
+    max_entries=settings.chat_context_max_entries,
+    ttl_seconds=settings.chat_context_ttl_seconds
+)
+
+
+def _on_family_change(event) -> None:
+    if event.parent_id is None:
+        chat_context_cache.invalidate_all_users()
+    else:
+        chat_context_cache.invalidate_parent(event.parent_id)
+
+
+def _on_reset(event) -> None:
+    chat_context_cache.invalidate_catalog()
+    chat_context_cache.invalidate_all_users()
+
+
+invalidation_bus.subscribe(ClassChanged, lambda event: chat_context_cache.invalidate_catalog())
+invalidation_bus.subscribe(EventChanged, lambda event: chat_context_cache.invalidate_catalog())
+invalidation_bus.subscribe(EnrollmentChanged, _on_family_change)
+invalidation_bus.subscribe(RegistrationChanged, _on_family_change)
+invalidation_bus.subscribe(AccountChanged, _on_family_change)
+invalidation_bus.subscribe(UserChanged, lambda event: chat_context_cache.invalidate_user(event.user_id))
+invalidation_bus.subscribe(TransportReconnected, _on_reset)
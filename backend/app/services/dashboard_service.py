@@ -0,0 +1,193 @@
+"""Parent dashboard assembly - fixed number of set-based queries per page view"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+from datetime import date
+from typing import Optional
+
+from app.models.models import (
+    User, Parent, Student, Enrollment, DanceClass,
+    Account, Transaction, Event, EventParticipant, DanceStyle, ClassLevel
+)
+
+RECENT_TRANSACTIONS_LIMIT = 10
+UPCOMING_EVENTS_LIMIT = 10
+
+
+async def load_parent_and_account(db: AsyncSession, user_id) -> tuple:
+    """Fetch the parent profile and its account in one round trip"""
+    result = await db.execute(
+        select(Parent, Account)
+        .outerjoin(Account, Account.parent_id == Parent.id)
+        .where(Parent.user_id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row[0], row[1]
+
+
+async def load_students_with_enrollments(db: AsyncSession, parent_id) -> tuple:
+    """Fetch students and their active enrollments (with class details) in one round trip"""
+    result = await db.execute(
+        select(Student, Enrollment, DanceClass, DanceStyle, ClassLevel)
+        .outerjoin(
+            Enrollment,
+            and_(Enrollment.student_id == Student.id, Enrollment.status == "active")
+        )
+        .outerjoin(DanceClass, Enrollment.class_id == DanceClass.id)
+        .outerjoin(DanceStyle, DanceClass.style_id == DanceStyle.id)
+        .outerjoin(ClassLevel, DanceClass.level_id == ClassLevel.id)
+        .where(Student.parent_id == parent_id)
+        .order_by(Student.created_at, Student.id)
+    )
+
+    students = {}
+    enrollments = []
+    for student, enrollment, dance_class, style, level in result.all():
+        students.setdefault(student.id, student)
+        if enrollment is None or dance_class is None:
+            continue
+        enrollments.append({
+            "id": str(enrollment.id),
+            "student_name": f"{student.first_name} {student.last_name}",
+            "class_name": dance_class.name,
+            "style": style.name if style else None,
+            "level": level.name if level else None,
+            "day_of_week": dance_class.day_of_week,
+            "start_time": str(dance_class.start_time),
+            "end_time": str(dance_class.end_time),
+            "studio_room": dance_class.studio_room,
+            "instructor_id": str(dance_class.instructor_id),
+            "monthly_tuition": float(dance_class.monthly_tuition),
+            "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None
+        })
+
+    return list(students.values()), enrollments
+
+
+async def load_recent_transactions(db: AsyncSession, account: Optional[Account]) -> list:
+    """Fetch the most recent transactions for an account"""
+    if account is None:
+        return []
+
+    result = await db.execute(
+        select(Transaction)
+        .where(Transaction.account_id == account.id)
+        .order_by(Transaction.created_at.desc())
+        .limit(RECENT_TRANSACTIONS_LIMIT)
+    )
+    return [
+        {
+            "id": str(t.id),
+            "amount": float(t.amount),
+            "transaction_type": t.transaction_type,
+            "description": t.description,
+            "status": t.status,
+            "created_at": t.created_at.isoformat()
+        }
+        for t in result.scalars().all()
+    ]
+
+
+async def load_upcoming_events(db: AsyncSession, parent_id) -> list:
+    """Fetch upcoming events with a per-parent registration flag computed by EXISTS"""
+    is_registered = (
+        select(EventParticipant.id)
+        .join(Student, EventParticipant.student_id == Student.id)
+        .where(
+            and_(
+                EventParticipant.event_id == Event.id,
+                Student.parent_id == parent_id
+            )
+        )
+        .exists()
+        .label("is_registered")
+    )
+
+    result = await db.execute(
+        select(Event, is_registered)
+        .where(
+            and_(
+                Event.is_active == True,
+                Event.start_date >= date.today()
+            )
+        )
+        .order_by(Event.start_date)
+        .limit(UPCOMING_EVENTS_LIMIT)
+    )
+    return [
+        {
+            "id": str(event.id),
+            "title": event.title,
+            "event_type": event.event_type,
+            "location": event.location,
+            "start_date": event.start_date.isoformat() if event.start_date else None,
+            "end_date": event.end_date.isoformat() if event.end_date else None,
+            "registration_deadline": event.registration_deadline.isoformat() if event.registration_deadline else None,
+            "entry_fee": float(event.entry_fee) if event.entry_fee else None,
+            "is_registered": bool(registered)
+        }
+        for event, registered in result.all()
+    ]
+
+
+async def build_parent_dashboard(db: AsyncSession, user: User, parent: Parent, account: Optional[Account]) -> dict:
+    """Assemble the parent dashboard payload.
+
+    Issues a fixed number of queries (students+enrollments, transactions,
+    events+registration flags) no matter how many students or events exist.
+    """
+    students, enrollments = await load_students_with_enrollments(db, parent.id)
+    transactions = await load_recent_transactions(db, account)
+    events = await load_upcoming_events(db, parent.id)
+
+    balance_info = None
+    if account:
+        balance_status = "owes" if account.current_balance > 0 else "has credit" if account.current_balance < 0 else "balanced"
+        balance_info = {
+            "id": str(account.id),
+            "current_balance": float(account.current_balance),
+            "status": balance_status,
+            "updated_at": account.updated_at.isoformat()
+        }
+
+    return {
+        "user": {
+            "id": str(user.id),
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "role": user.role,
+            "phone": user.phone
+        },
+        "parent": {
+            "id": str(parent.id),
+            "emergency_contact_name": parent.emergency_contact_name,
+            "emergency_contact_phone": parent.emergency_contact_phone,
+            "address_line1": parent.address_line1,
+            "city": parent.city,
+            "state": parent.state,
+            "zip_code": parent.zip_code
+        },
+        "students": [
+            {
+                "id": str(s.id),
+                "first_name": s.first_name,
+                "last_name": s.last_name,
+                "date_of_birth": s.date_of_birth.isoformat() if s.date_of_birth else None,
+                "school_grade": s.school_grade,
+                "is_active": s.is_active
+            }
+            for s in students
+        ],
+        "account": balance_info,
+        "transactions": transactions,
+        "enrollments": enrollments,
+        "upcoming_events": events,
+        "summary": {
+            "total_students": len(students),
+            "active_enrollments": len(enrollments),
+            "upcoming_events_count": len(events),
+            "recent_transactions_count": len(transactions)
+        }
+    }
@@ -0,0 +1,141 @@
+"""Per-request query counting, DB time and slow-query logging"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.db")
+
+QUERY_COUNT_HEADER = "X-DB-Queries"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+SLOWEST_QUERY_HEADER = "X-DB-Slowest-Ms"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def redact_sql(statement: str, max_length: int = 1000) -> str:
+    """Collapse whitespace and replace inline literals with ?; bound parameters are never logged"""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return statement if len(statement) <= max_length else statement[:max_length] + "..."
+
+
+class QueryStats:
+    """Queries issued within one request (or one assert_max_queries block)"""
+
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        if elapsed > self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_statement = statement
+
+    def headers(self) -> dict:
+        return {
+            QUERY_COUNT_HEADER: str(self.count),
+            QUERY_TIME_HEADER: f"{self.total_seconds * 1000:.1f}",
+            SLOWEST_QUERY_HEADER: f"{self.slowest_seconds * 1000:.1f}"
+        }
+
+    def log_record(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.total_seconds * 1000, 1),
+            "slowest_ms": round(self.slowest_seconds * 1000, 1),
+            "slowest_sql": redact_sql(self.slowest_statement) if self.slowest_statement else None
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+def start_request() -> QueryStats:
+    """Begin collecting stats for the current request context"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def log_request(method: str, path: str, status_code: int, stats: QueryStats) -> None:
+    logger.info(json.dumps({
+        "event": "db_request",
+        "method": method,
+        "path": path,
+        "status": status_code,
+        **stats.log_record()
+    }))
+
+
+def instrument_engine(engine, slow_query_ms: float) -> None:
+    """Time every statement on an (async) engine and log the slow ones"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    slow_seconds = slow_query_ms / 1000
+
+    # The start time lives on the statement's execution context, which is
+    # discarded with it, so a statement that raises leaves nothing behind
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_start", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if elapsed >= slow_seconds:
+            logger.warning(json.dumps({
+                "event": "slow_query",
+                "ms": round(elapsed * 1000, 1),
+                "sql": redact_sql(statement)
+            }))
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """Fail if the block issues more than max_queries statements (for tests).
+
+        with assert_max_queries(4):
+            await build_parent_dashboard(db, user, parent, account)
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, got {stats.count} "
+            f"(slowest: {redact_sql(stats.slowest_statement or '')})"
+        )
+
+
+def assert_query_budget(response, max_queries: int) -> None:
+    """Pin an endpoint to a query budget using the header on a test client response"""
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    if count > max_queries:
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} issued {count} queries, "
+            f"budget is {max_queries}"
+        )
@@ -0,0 +1,281 @@
+"""Enrollment engine - race-free seat accounting for class enrollments"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, func, case, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date
+
+from app.models.models import DanceClass, Enrollment, Student
+
+ACTIVE = "active"
+WAITLISTED = "waitlisted"
+DROPPED = "dropped"
+REJECTED = "rejected"
+
+# Batch rejection reasons, one per pair
+DUPLICATE_PAIR = "duplicate_pair"
+STUDENT_NOT_FOUND = "student_not_found"
+NOT_AUTHORIZED = "not_authorized"
+CLASS_NOT_FOUND = "class_not_found"
+CLASS_FULL = "class_full"
+ALREADY_ENROLLED = "already_enrolled"
+
+
+class EnrollmentError(Exception):
+    """Base class for enrollment failures"""
+
+
+class ClassNotFoundError(EnrollmentError):
+    pass
+
+
+class ClassFullError(EnrollmentError):
+    pass
+
+
+class AlreadyEnrolledError(EnrollmentError):
+    pass
+
+
+def waitlist_counts():
+    """Waitlist length per class as a subquery (served by the partial waitlist index)"""
+    return (
+        select(Enrollment.class_id, func.count().label("waitlist_count"))
+        .where(Enrollment.status == WAITLISTED)
+        .group_by(Enrollment.class_id)
+        .subquery()
+    )
+
+
+def with_availability(query, waitlist):
+    """Add the class's waitlist length to a DanceClass select; seats come from enrolled_count"""
+    return (
+        query.add_columns(func.coalesce(waitlist.c.waitlist_count, 0))
+        .outerjoin(waitlist, waitlist.c.class_id == DanceClass.id)
+    )
+
+
+async def reserve_seat(db: AsyncSession, class_id) -> bool:
+    """Atomically take one seat if the class has room.
+
+    The conditional UPDATE row-locks the class, and Postgres re-checks the
+    WHERE clause after any concurrent writer commits, so two requests can
+    never both take the last seat.
+    """
+    result = await db.execute(
+        update(DanceClass)
+        .where(
+            and_(
+                DanceClass.id == class_id,
+                DanceClass.is_active == True,
+                DanceClass.enrolled_count < DanceClass.max_capacity
+            )
+        )
+        .values(enrolled_count=DanceClass.enrolled_count + 1)
+        .returning(DanceClass.id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def lock_class(db: AsyncSession, class_id):
+    """Row-lock a class and return its is_active flag (None if it does not exist).
+
+    Dropping and waitlisting take this lock before touching the waitlist, so
+    a seat freed by a drop and a student joining the waitlist cannot pass
+    each other.
+    """
+    result = await db.execute(
+        select(DanceClass.is_active).where(DanceClass.id == class_id).with_for_update()
+    )
+    return result.scalar_one_or_none()
+
+
+async def release_seat(db: AsyncSession, class_id) -> None:
+    await db.execute(
+        update(DanceClass)
+        .where(and_(DanceClass.id == class_id, DanceClass.enrolled_count > 0))
+        .values(enrolled_count=DanceClass.enrolled_count - 1)
+    )
+
+
+async def _upsert_enrollment(db: AsyncSession, student_id, class_id, status: str):
+    """Insert the enrollment, or revive a dropped one; None if already active/waitlisted"""
+    today = date.today()
+    statement = insert(Enrollment).values(
+        student_id=student_id,
+        class_id=class_id,
+        enrollment_date=today,
+        status=status
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[Enrollment.student_id, Enrollment.class_id],
+        set_={"status": status, "enrollment_date": today, "drop_date": None},
+        where=Enrollment.status.notin_([ACTIVE, WAITLISTED])
+    ).returning(Enrollment.id)
+    result = await db.execute(statement)
+    return result.scalar_one_or_none()
+
+
+async def enroll(db: AsyncSession, student_id, class_id, allow_waitlist: bool = False) -> str:
+    """Enroll a student, returning the resulting status ("active" or "waitlisted").
+
+    Changes are left uncommitted for the caller; on error the caller must
+    roll back so a reserved seat is returned.
+    """
+    status = ACTIVE
+    if not await reserve_seat(db, class_id):
+        # Full when we looked; under the class lock a concurrent drop has
+        # either finished (retry the seat) or not started (it will promote us)
+        if not await lock_class(db, class_id):
+            raise ClassNotFoundError()
+        if not await reserve_seat(db, class_id):
+            if not allow_waitlist:
+                raise ClassFullError()
+            status = WAITLISTED
+
+    if await _upsert_enrollment(db, student_id, class_id, status) is None:
+        raise AlreadyEnrolledError()
+    return status
+
+
+async def enroll_batch(
+    db: AsyncSession, pairs: list, parent_id=None, allow_waitlist: bool = False
+) -> list:
+    """Enroll many (student_id, class_id) pairs in a fixed number of statements, one result dict per pair"""
+    results = [
+        {"student_id": student_id, "class_id": class_id, "parent_id": None, "status": REJECTED, "error": None}
+        for student_id, class_id in pairs
+    ]
+    pending = []
+    seen = set()
+    for result in results:
+        pair = (result["student_id"], result["class_id"])
+        if pair in seen:
+            result["error"] = DUPLICATE_PAIR
+        else:
+            seen.add(pair)
+            pending.append(result)
+    if not pending:
+        return results
+
+    student_ids = {result["student_id"] for result in pending}
+    students = dict((await db.execute(
+        select(Student.id, Student.parent_id).where(Student.id.in_(student_ids))
+    )).all())
+
+    class_ids = {result["class_id"] for result in pending}
+    # Row-lock the classes in id order, so concurrent batches cannot deadlock
+    classes = {
+        class_id: (max_capacity or 0) - enrolled_count
+        for class_id, max_capacity, enrolled_count in (await db.execute(
+            select(DanceClass.id, DanceClass.max_capacity, DanceClass.enrolled_count)
+            .where(and_(DanceClass.id.in_(class_ids), DanceClass.is_active == True))
+            .order_by(DanceClass.id)
+            .with_for_update()
+        )).all()
+    }
+
+    existing = set((await db.execute(
+        select(Enrollment.student_id, Enrollment.class_id).where(
+            and_(
+                tuple_(Enrollment.student_id, Enrollment.class_id).in_(list(seen)),
+                Enrollment.status.in_([ACTIVE, WAITLISTED])
+            )
+        )
+    )).all())
+
+    accepted = []
+    for result in pending:
+        student_id, class_id = result["student_id"], result["class_id"]
+        if student_id not in students:
+            result["error"] = STUDENT_NOT_FOUND
+            continue
+        if parent_id is not None and students[student_id] != parent_id:
+            result["error"] = NOT_AUTHORIZED
+            continue
+        result["parent_id"] = students[student_id]
+        if class_id not in classes:
+            result["error"] = CLASS_NOT_FOUND
+        elif (student_id, class_id) in existing:
+            result["error"] = ALREADY_ENROLLED
+        elif classes[class_id] > 0:
+            classes[class_id] -= 1
+            result["status"] = ACTIVE
+            accepted.append(result)
+        elif allow_waitlist:
+            result["status"] = WAITLISTED
+            accepted.append(result)
+        else:
+            result["error"] = CLASS_FULL
+
+    if not accepted:
+        return results
+
+    today = date.today()
+    statement = insert(Enrollment).values([
+        {
+            "student_id": result["student_id"],
+            "class_id": result["class_id"],
+            "enrollment_date": today,
+            "status": result["status"]
+        }
+        for result in accepted
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[Enrollment.student_id, Enrollment.class_id],
+        set_={"status": statement.excluded.status, "enrollment_date": today, "drop_date": None},
+        where=Enrollment.status.notin_([ACTIVE, WAITLISTED])
+    ).returning(Enrollment.student_id, Enrollment.class_id)
+    written = set((await db.execute(statement)).all())
+
+    # A waitlist join that raced past the existing-enrollment check loses here
+    seats = {}
+    for result in accepted:
+        if (result["student_id"], result["class_id"]) not in written:
+            result["status"] = REJECTED
+            result["error"] = ALREADY_ENROLLED
+        elif result["status"] == ACTIVE:
+            seats[result["class_id"]] = seats.get(result["class_id"], 0) + 1
+
+    if seats:
+        await db.execute(
+            update(DanceClass)
+            .where(DanceClass.id.in_(list(seats)))
+            .values(enrolled_count=DanceClass.enrolled_count + case(seats, value=DanceClass.id, else_=0))
+        )
+    return results
+
+
+async def drop(db: AsyncSession, enrollment: Enrollment):
+    """Drop an enrollment and hand its seat to the longest-waiting student, if any.
+
+    Returns the parent_id of the promoted student's family, whose cached
+    views change too, or None when nobody was promoted.
+    """
+    was_active = enrollment.status == ACTIVE
+    enrollment.status = DROPPED
+    enrollment.drop_date = date.today()
+
+    if not was_active:
+        return None
+
+    await lock_class(db, enrollment.class_id)
+
+    waiting = await db.execute(
+        select(Enrollment)
+        .where(
+            and_(
+                Enrollment.class_id == enrollment.class_id,
+                Enrollment.status == WAITLISTED
+            )
+        )
+        .order_by(Enrollment.enrollment_date, Enrollment.created_at)
+        .limit(1)
+        .with_for_update()
+    )
+    promoted = waiting.scalar_one_or_none()
+    if promoted is None:
+        await release_seat(db, enrollment.class_id)
+        return None
+    promoted.status = ACTIVE
+    promoted.enrollment_date = date.today()
+    return await db.scalar(select(Student.parent_id).where(Student.id == promoted.student_id))
@@ -0,0 +1,198 @@
+"""Bulk event registration with entry fee charging"""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.models import Account, Event, EventParticipant, Student, Transaction
+from app.services.ledger_service import lock_accounts
+
+REGISTERED = "registered"
+REJECTED = "rejected"
+
+# Rejection reasons, one per student
+DUPLICATE_STUDENT = "duplicate_student"
+STUDENT_NOT_FOUND = "student_not_found"
+NOT_AUTHORIZED = "not_authorized"
+ALREADY_REGISTERED = "already_registered"
+
+
+class RegistrationError(Exception):
+    """Base class for failures that reject the whole batch"""
+
+
+class EventNotFoundError(RegistrationError):
+    pass
+
+
+class RegistrationClosedError(RegistrationError):
+    pass
+
+
+def fee_key(event_id, student_id) -> str:
+    return f"event:{event_id}:{student_id}"
+
+
+def fee_type(event_type) -> str:
+    return "competition" if event_type == "competition" else "registration"
+
+
+async def _account_ids(db: AsyncSession, parent_ids: set, known: dict) -> dict:
+    """Account id per parent, opening accounts for parents that have none yet"""
+    missing = parent_ids - known.keys()
+    if not missing:
+        return known
+    await db.execute(
+        insert(Account)
+        .values([{"id": uuid.uuid4(), "parent_id": parent_id} for parent_id in missing])
+        .on_conflict_do_nothing(index_elements=[Account.parent_id])
+    )
+    result = await db.execute(select(Account.parent_id, Account.id).where(Account.parent_id.in_(missing)))
+    return {**known, **dict(result.all())}
+
+
+async def _charge_fees(db: AsyncSession, event, registered: list, account_ids: dict, created_by) -> tuple:
+    """Insert one entry fee per registration and add them to the account balances.
+
+    One statement, as in the tuition run: fees already charged for a
+    registration (unique idempotency key) are skipped, and only the rows
+    actually inserted feed the balance UPDATE. Returns (accounts charged,
+    amount charged).
+    """
+    await lock_accounts(db, {account_ids[parent_id] for _, parent_id in registered})
+    inserted = (
+        insert(Transaction)
+        .values([
+            {
+                "id": uuid.uuid4(),
+                "account_id": account_ids[parent_id],
+                "student_id": student_id,
+                "amount": event.entry_fee,
+                "transaction_type": fee_type(event.event_type),
+                "description": f"Entry fee - {event.title}",
+                "status": "completed",
+                "due_date": event.registration_deadline or event.start_date,
+                "idempotency_key": fee_key(event.id, student_id),
+                "created_at": func.now(),
+                "created_by": created_by
+            }
+            for student_id, parent_id in registered
+        ])
+        .on_conflict_do_nothing(index_elements=[Transaction.idempotency_key])
+        .returning(Transaction.account_id, Transaction.amount)
+        .cte("inserted")
+    )
+    totals = (
+        select(inserted.c.account_id, func.sum(inserted.c.amount).label("total"))
+        .group_by(inserted.c.account_id)
+        .cte("totals")
+    )
+    result = await db.execute(
+        update(Account)
+        .where(Account.id == totals.c.account_id)
+        .values(
+            current_balance=func.coalesce(Account.current_balance, 0) + totals.c.total,
+            total_charges=Account.total_charges + totals.c.total,
+            last_activity_at=func.now(),
+            updated_at=func.now()
+        )
+        .returning(totals.c.total)
+    )
+    totals_charged = result.scalars().all()
+    return len(totals_charged), sum(totals_charged, Decimal("0"))
+
+
+async def register_batch(
+    db: AsyncSession, event_id, student_ids: list, parent_id=None, created_by=None, notes=None
+) -> dict:
+    """Register many students for an event and charge its entry fee, set-based, one result dict per student"""
+    event_result = await db.execute(
+        select(
+            Event.id, Event.title, Event.event_type, Event.entry_fee,
+            Event.registration_deadline, Event.start_date
+        ).where(and_(Event.id == event_id, Event.is_active == True))
+    )
+    event = event_result.one_or_none()
+    if event is None:
+        raise EventNotFoundError()
+    if event.registration_deadline and date.today() > event.registration_deadline:
+        raise RegistrationClosedError()
+
+    results = [
+        {"student_id": student_id, "parent_id": None, "status": REJECTED, "error": None}
+        for student_id in student_ids
+    ]
+    pending = []
+    seen = set()
+    for result in results:
+        if result["student_id"] in seen:
+            result["error"] = DUPLICATE_STUDENT
+        else:
+            seen.add(result["student_id"])
+            pending.append(result)
+
+    student_result = await db.execute(
+        select(Student.id, Student.parent_id, Account.id)
+        .outerjoin(Account, Account.parent_id == Student.parent_id)
+        .where(Student.id.in_(seen))
+    )
+    students = {}
+    known_accounts = {}
+    for student_id, student_parent_id, account_id in student_result.all():
+        students[student_id] = student_parent_id
+        if account_id is not None:
+            known_accounts[student_parent_id] = account_id
+
+    accepted = []
+    for result in pending:
+        student_id = result["student_id"]
+        if student_id not in students:
+            result["error"] = STUDENT_NOT_FOUND
+        elif parent_id is not None and students[student_id] != parent_id:
+            result["error"] = NOT_AUTHORIZED
+        else:
+            result["parent_id"] = students[student_id]
+            accepted.append(result)
+
+    summary = {"registered": 0, "accounts_charged": 0, "amount_charged": Decimal("0"), "results": results}
+    if not accepted:
+        return summary
+
+    today = date.today()
+    inserted = await db.execute(
+        insert(EventParticipant)
+        .values([
+            {
+                "id": uuid.uuid4(),
+                "event_id": event.id,
+                "student_id": result["student_id"],
+                "registration_date": today,
+                "fee_paid": False,
+                "notes": notes
+            }
+            for result in accepted
+        ])
+        # The unique (event_id, student_id) index stops two batches registering a student twice
+        .on_conflict_do_nothing(index_elements=[EventParticipant.event_id, EventParticipant.student_id])
+        .returning(EventParticipant.student_id)
+    )
+    written = set(inserted.scalars().all())
+
+    registered = []
+    for result in accepted:
+        if result["student_id"] in written:
+            result["status"] = REGISTERED
+            registered.append((result["student_id"], result["parent_id"]))
+        else:
+            result["error"] = ALREADY_REGISTERED
+    summary["registered"] = len(registered)
+
+    if registered and event.entry_fee and event.entry_fee > 0:
+        account_ids = await _account_ids(db, {family for _, family in registered}, known_accounts)
+        summary["accounts_charged"], summary["amount_charged"] = await _charge_fees(
+            db, event, registered, account_ids, created_by
+        )
+    return summary
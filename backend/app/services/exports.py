@@ -0,0 +1,80 @@
+"""Streamed CSV / NDJSON helpers for report and export endpoints"""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.database import AsyncSessionLocal
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def _encode_csv(rows: Iterable) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def csv_chunks(header: list, rows: Iterable, rows_per_chunk: int = 500) -> Iterator[bytes]:
+    """Encode rows as CSV a chunk at a time so the full file is never built in memory"""
+    yield _encode_csv([header])
+    rows = iter(rows)
+    while batch := list(islice(rows, rows_per_chunk)):
+        yield _encode_csv(batch)
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(header: list, rows: Iterable) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(header, row)), default=_json_value, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode()
+
+
+async def stream_query(query, header: list, fmt: str, batch_size: int = 1000) -> AsyncIterator[bytes]:
+    """Run query on a server-side cursor and encode it one batch at a time.
+
+    Uses its own session because the request session is closed before a
+    streaming body starts. Only batch_size rows are held at once, so memory
+    stays flat however many rows the query returns.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        if fmt == "csv":
+            yield _encode_csv([header])
+        async for rows in result.partitions():
+            yield _encode_csv(rows) if fmt == "csv" else _encode_ndjson(header, rows)
+
+
+def export_response(query, header: list, fmt: str, filename: str) -> StreamingResponse:
+    """StreamingResponse for a column-only select in the requested format"""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        stream_query(query, header, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
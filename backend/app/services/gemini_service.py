@@ -1,15 +1,72 @@
 """Google Gemini AI Service for Studio4 Chat Widgets"""
-import google.generativeai as genai
-from app.config import get_settings
+import asyncio
+import json
+import time
 import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.services.metrics import Histogram
+from app.services.session_store import create_session_store
+
+
+class GeminiError(Exception):
+    """Raised when the Gemini API returns an error or an unusable response"""
+
 
 class GeminiService:
     def __init__(self):
         self.settings = get_settings()
-        if self.settings.gemini_api_key:
-            genai.configure(api_key=self.settings.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.chat_sessions = {}
+        self.model_name = self.settings.gemini_model
+        self.base_url = self.settings.gemini_api_base_url.rstrip("/")
+        self.sessions = create_session_store()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.latency = Histogram()
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.settings.gemini_timeout_seconds
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.settings.gemini_max_concurrency)
+        return self._semaphore
+
+    @contextmanager
+    def _track_call(self):
+        """Time one upstream call; failures count as errors, client disconnects do not"""
+        started = time.perf_counter()
+        self.calls += 1
+        try:
+            yield
+        except (GeneratorExit, asyncio.CancelledError):
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+
+    def call_stats(self) -> dict:
+        return {"calls": self.calls, "errors": self.errors, "latency_seconds": self.latency.snapshot()}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def get_system_context(self, is_authenticated: bool, user_data: dict = None) -> str:
         """Get context based on authentication status"""
@@ -43,24 +100,95 @@ You can help them with:
 
         return base_context
 
+    def _build_contents(self, system_prompt: str, history: list, user_message: str) -> list:
+        """Prefix the conversation with the system prompt as a seeded exchange.
+
+        gemini-pro has no system instruction field, so the prompt is sent as
+        the first user turn on every call rather than stored in history.
+        """
+        return [
+            {"role": "user", "parts": [{"text": system_prompt}]},
+            {"role": "model", "parts": [{"text": "Understood."}]},
+            *history,
+            {"role": "user", "parts": [{"text": user_message}]}
+        ]
+
+    def _request_params(self, **extra) -> dict:
+        params = {"key": self.settings.gemini_api_key}
+        params.update(extra)
+        return params
+
+    @staticmethod
+    def _extract_text(payload: dict) -> str:
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    async def generate_response(self, user_message: str, system_prompt: str, session_id: str) -> str:
+        """Send a message and return the full AI response without blocking the event loop"""
+        history = await self.sessions.get(session_id)
+        body = {"contents": self._build_contents(system_prompt, history, user_message)}
+
+        async with self.semaphore:
+            with self._track_call():
+                response = await self.client.post(
+                    f"/models/{self.model_name}:generateContent",
+                    params=self._request_params(),
+                    json=body
+                )
+                if response.status_code != 200:
+                    raise GeminiError(f"Gemini API error {response.status_code}: {response.text}")
+
+                reply = self._extract_text(response.json())
+                if not reply:
+                    raise GeminiError("Gemini API returned an empty response")
+
+        await self.sessions.append_turn(session_id, history, user_message, reply)
+        return reply
+
+    async def stream_response(self, user_message: str, system_prompt: str, session_id: str) -> AsyncIterator[str]:
+        """Yield response text chunks as the model produces them (server-sent events upstream)"""
+        history = await self.sessions.get(session_id)
+        body = {"contents": self._build_contents(system_prompt, history, user_message)}
+        chunks = []
+
+        async with self.semaphore:
+            with self._track_call():
+                async with self.client.stream(
+                    "POST",
+                    f"/models/{self.model_name}:streamGenerateContent",
+                    params=self._request_params(alt="sse"),
+                    json=body
+                ) as response:
+                    if response.status_code != 200:
+                        detail = (await response.aread()).decode(errors="replace")
+                        raise GeminiError(f"Gemini API error {response.status_code}: {detail}")
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        text = self._extract_text(json.loads(line[len("data:"):]))
+                        if text:
+                            chunks.append(text)
+                            yield text
+
+        if chunks:
+            await self.sessions.append_turn(session_id, history, user_message, "".join(chunks))
+
     async def chat(self, message: str, session_id: str = None, is_authenticated: bool = False, user_data: dict = None) -> dict:
         """Send a message and get AI response"""
         try:
             if not session_id:
                 session_id = str(uuid.uuid4())
 
-            # Get or create chat session
-            if session_id not in self.chat_sessions:
-                context = self.get_system_context(is_authenticated, user_data)
-                self.model = genai.GenerativeModel('gemini-pro', system_instruction=context)
-                self.chat_sessions[session_id] = self.model.start_chat(history=[])
-
-            chat = self.chat_sessions[session_id]
-            response = chat.send_message(message)
+            context = self.get_system_context(is_authenticated, user_data)
+            response = await self.generate_response(message, context, session_id)
 
             return {
                 "success": True,
-                "response": response.text,
+                "response": response,
                 "session_id": session_id
             }
         except Exception as e:
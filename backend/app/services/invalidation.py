@@ -0,0 +1,254 @@
+"""In-process cache invalidation bus with an optional Postgres LISTEN/NOTIFY fan-out"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+import asyncpg
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Change events, published by write handlers after their commit. Ids are
+# strings so events survive the JSON round trip through NOTIFY unchanged.
+
+@dataclass(frozen=True)
+class ClassChanged:
+    class_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class EnrollmentChanged:
+    parent_id: str
+    class_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class EventChanged:
+    event_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RegistrationChanged:
+    parent_id: Optional[str] = None  # None: many families at once
+    event_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AccountChanged:
+    parent_id: Optional[str] = None  # None: many accounts at once (tuition run, reconcile)
+
+
+@dataclass(frozen=True)
+class UserChanged:
+    user_id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AnnouncementChanged:
+    announcement_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TransportReconnected:
+    """Notifications may have been missed while disconnected; drop everything"""
+
+
+EVENT_TYPES = {
+    cls.__name__: cls
+    for cls in (ClassChanged, EnrollmentChanged, EventChanged, RegistrationChanged,
+                AccountChanged, UserChanged, AnnouncementChanged, TransportReconnected)
+}
+
+
+class InvalidationBus:
+    """Routes change events to the caches that depend on them.
+
+    Subscribers are plain callables run synchronously in the publishing
+    task. With a transport attached, events are also sent to every other
+    worker, which dispatches them to its own subscribers.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.transport: Optional["PostgresNotifyTransport"] = None
+        self._subscribers = defaultdict(list)
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, event_type: type, handler: Callable) -> None:
+        self._subscribers[event_type].append(handler)
+
+    def dispatch(self, event) -> None:
+        """Run local subscribers; one failing cache must not block the others"""
+        for handler in self._subscribers[type(event)]:
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Invalidation handler failed for %s", event)
+
+    async def publish(self, event) -> None:
+        self.published += 1
+        self.dispatch(event)
+        if self.transport is not None:
+            await self.transport.send(self.encode(event))
+
+    def encode(self, event) -> str:
+        return json.dumps({"origin": self.origin, "type": type(event).__name__, "fields": asdict(event)})
+
+    def receive(self, payload: str) -> None:
+        """Dispatch an event that arrived from another worker"""
+        try:
+            message = json.loads(payload)
+            if message["origin"] == self.origin:
+                return
+            event = EVENT_TYPES[message["type"]](**message["fields"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation message: %.200s", payload)
+            return
+        self.received += 1
+        self.dispatch(event)
+
+    async def start(self) -> None:
+        if self.transport is not None:
+            await self.transport.start()
+
+    async def stop(self) -> None:
+        if self.transport is not None:
+            await self.transport.stop()
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "received": self.received,
+            "transport": "postgres" if self.transport is not None else "local",
+            "connected": self.transport.connected if self.transport is not None else None,
+            "pending": self.transport.pending() if self.transport is not None else 0
+        }
+
+
+class PostgresNotifyTransport:
+    """Fans events out to every worker through LISTEN/NOTIFY on one dedicated connection.
+
+    The connection is kept outside the SQLAlchemy pool because LISTEN is
+    session state. After a reconnect a TransportReconnected event is
+    dispatched locally, since notifications sent meanwhile were lost. Events
+    this worker could not send are queued and replayed once connected again;
+    if more than max_pending pile up, a TransportReconnected is broadcast
+    instead so every other worker drops its caches.
+    """
+
+    def __init__(self, bus: InvalidationBus, dsn: str, channel: str,
+                 reconnect_seconds: float = 5.0, max_pending: int = 1000):
+        self.bus = bus
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.max_pending = max_pending
+        self.connected = False
+        self.send_failures = 0
+        self.resent = 0
+        self._pending = deque()
+        self._overflowed = False
+        self._connection = None
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._send_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.bus.receive(payload)
+
+    async def _run(self) -> None:
+        first = True
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                await self._flush_pending(connection)
+                self._connection = connection
+                self.connected = True
+                if not first:
+                    self.bus.dispatch(TransportReconnected())
+                first = False
+                await closed.wait()
+                logger.warning("Invalidation listener connection closed; reconnecting")
+            except asyncio.CancelledError:
+                if self._connection is not None:
+                    await self._connection.close()
+                raise
+            except Exception:
+                logger.exception("Invalidation listener failed; retrying in %.0fs", self.reconnect_seconds)
+            finally:
+                self.connected = False
+                self._connection = None
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def send(self, payload: str) -> None:
+        """NOTIFY the other workers; local subscribers have already run"""
+        connection = self._connection
+        if connection is None:
+            self._defer(payload)
+            return
+        try:
+            async with self._send_lock:
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception:
+            logger.exception("Failed to publish invalidation event; will retry after reconnect")
+            self._defer(payload)
+
+    def _defer(self, payload: str) -> None:
+        self.send_failures += 1
+        if len(self._pending) < self.max_pending:
+            self._pending.append(payload)
+        else:
+            self._overflowed = True
+
+    async def _flush_pending(self, connection) -> None:
+        """Send the events that failed while disconnected (or one reset if too many did)"""
+        async with self._send_lock:
+            if self._overflowed:
+                self._pending.clear()
+                self._pending.append(self.bus.encode(TransportReconnected()))
+                self._overflowed = False
+            while self._pending:
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, self._pending[0])
+                self._pending.popleft()
+                self.resent += 1
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    return database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+settings = get_settings()
+invalidation_bus = InvalidationBus()
+if settings.invalidation_transport == "postgres":
+    invalidation_bus.transport = PostgresNotifyTransport(
+        invalidation_bus,
+        dsn=_asyncpg_dsn(settings.database_url),
+        channel=settings.invalidation_channel
+    )
@@ -0,0 +1,197 @@
+"""Account balance engine - atomic balance deltas and ledger reconciliation"""
+import asyncio
+import logging
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, or_, func, cast, String
+
+from app.database import AsyncSessionLocal
+from app.models.models import Account, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_column(transaction_type: str, amount: Decimal):
+    """Which running total a transaction feeds: payments, other credits, or charges"""
+    if transaction_type == "payment":
+        return Account.total_payments
+    if amount < 0:
+        return Account.total_credits
+    return Account.total_charges
+
+
+def is_payment():
+    """transaction_type = 'payment', compared as text: schema.sql types the
+    column as an ENUM without a 'payment' label, which rejects the literal"""
+    return cast(Transaction.transaction_type, String) == "payment"
+
+
+def rollup_delta(transaction_type: str, amount: Decimal) -> Decimal:
+    """Signed change to that running total, matching how _ledger_values sums it:
+    charges add the amount, payments and credits add its negation (so a
+    refund booked as a positive payment lowers total_payments)."""
+    if rollup_column(transaction_type, amount) is Account.total_charges:
+        return amount
+    return -amount
+
+
+async def apply_delta(db: AsyncSession, account_id, delta: Decimal, transaction_type: str, parent_id=None) -> Optional[tuple]:
+    """Add delta to an account balance and its running totals in the database.
+
+    Runs a single UPDATE ... RETURNING, so the increment is applied under the
+    row lock and concurrent charges/payments cannot overwrite each other. The
+    lock is held until the caller commits. When parent_id is given the update
+    only matches that parent's account. Returns (account_id, parent_id,
+    new_balance), or None if no account matched.
+    """
+    conditions = [Account.id == account_id]
+    if parent_id is not None:
+        conditions.append(Account.parent_id == parent_id)
+
+    rollup = rollup_column(transaction_type, delta)
+    result = await db.execute(
+        update(Account)
+        .where(and_(*conditions))
+        .values({
+            Account.current_balance: func.coalesce(Account.current_balance, 0) + delta,
+            rollup: rollup + rollup_delta(transaction_type, delta),
+            Account.last_activity_at: func.now(),
+            Account.updated_at: func.now()
+        })
+        .returning(Account.id, Account.parent_id, Account.current_balance)
+    )
+    return result.one_or_none()
+
+
+async def lock_accounts(db: AsyncSession, account_ids) -> None:
+    """Row-lock accounts in id order before a multi-account balance UPDATE.
+
+    An UPDATE over many accounts locks them in whatever order the plan
+    visits them, so two bulk writers (tuition batches, team registrations)
+    could deadlock; taking the locks in one global order first prevents it.
+    """
+    await db.execute(
+        select(Account.id)
+        .where(Account.id.in_(list(account_ids)))
+        .order_by(Account.id)
+        .with_for_update()
+    )
+
+
+def _ledger_sum(amount, *conditions):
+    """Correlated sum over completed transactions for the outer Account row"""
+    return (
+        select(func.coalesce(func.sum(amount), 0))
+        .where(
+            and_(
+                Transaction.account_id == Account.id,
+                Transaction.status == "completed",
+                *conditions
+            )
+        )
+        .scalar_subquery()
+    )
+
+
+def _ledger_values() -> dict:
+    """Balance and running totals recomputed from the transaction ledger"""
+    payment = is_payment()
+    return {
+        "current_balance": _ledger_sum(Transaction.amount),
+        "total_charges": _ledger_sum(Transaction.amount, ~payment, Transaction.amount >= 0),
+        "total_payments": _ledger_sum(-Transaction.amount, payment),
+        "total_credits": _ledger_sum(-Transaction.amount, ~payment, Transaction.amount < 0),
+        "last_activity_at": (
+            select(func.max(Transaction.created_at))
+            .where(Transaction.account_id == Account.id)
+            .scalar_subquery()
+        ),
+        "updated_at": func.now()
+    }
+
+
+async def reconcile_balances(db: AsyncSession, apply: bool = False) -> dict:
+    """Compare every stored balance and running total with its completed transactions.
+
+    The comparison is one grouped query over transactions; with apply=True the
+    drifted accounts get their balance and running totals rebuilt in one
+    UPDATE. The caller commits.
+    """
+    payment = is_payment()
+    ledger = (
+        select(
+            Transaction.account_id,
+            func.sum(Transaction.amount).label("total"),
+            func.sum(Transaction.amount).filter(and_(~payment, Transaction.amount >= 0)).label("charges"),
+            func.sum(-Transaction.amount).filter(payment).label("payments"),
+            func.sum(-Transaction.amount).filter(and_(~payment, Transaction.amount < 0)).label("credits")
+        )
+        .where(Transaction.status == "completed")
+        .group_by(Transaction.account_id)
+        .subquery()
+    )
+    ledger_total = func.coalesce(ledger.c.total, 0)
+    stored = func.coalesce(Account.current_balance, 0)
+    rollups = {
+        "total_charges": Account.total_charges != func.coalesce(ledger.c.charges, 0),
+        "total_payments": Account.total_payments != func.coalesce(ledger.c.payments, 0),
+        "total_credits": Account.total_credits != func.coalesce(ledger.c.credits, 0)
+    }
+
+    result = await db.execute(
+        select(Account.id, stored.label("stored"), ledger_total.label("ledger"), *rollups.values())
+        .outerjoin(ledger, ledger.c.account_id == Account.id)
+        .where(or_(stored != ledger_total, *rollups.values()))
+    )
+    drifted = [
+        {
+            "account_id": str(account_id),
+            "stored_balance": float(stored_balance),
+            "ledger_balance": float(ledger_balance),
+            "drift": float(stored_balance - ledger_balance),
+            "rollups_drifted": [name for name, mismatch in zip(rollups, mismatches) if mismatch]
+        }
+        for account_id, stored_balance, ledger_balance, *mismatches in result.all()
+    ]
+
+    checked = (await db.execute(select(func.count(Account.id)))).scalar_one()
+
+    if apply and drifted:
+        drifted_ids = [row["account_id"] for row in drifted]
+        # Lock first: the rebuild's ledger subqueries then run on a snapshot
+        # taken after any in-flight apply_delta on these accounts committed
+        await lock_accounts(db, drifted_ids)
+        await db.execute(
+            update(Account)
+            .where(Account.id.in_(drifted_ids))
+            .values(**_ledger_values())
+        )
+
+    return {
+        "accounts_checked": checked,
+        "accounts_drifted": len(drifted),
+        "total_drift": round(sum(row["drift"] for row in drifted), 2),
+        "applied": apply and bool(drifted),
+        "drifted": drifted
+    }
+
+
+async def run_reconciliation_loop(interval_seconds: int) -> None:
+    """Periodically report balance drift (report only, never corrects)"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                report = await reconcile_balances(db)
+        except Exception:
+            logger.exception("Balance reconciliation failed")
+            continue
+        if report["accounts_drifted"]:
+            logger.warning(
+                "Balance drift on %d of %d accounts (total %.2f)",
+                report["accounts_drifted"], report["accounts_checked"], report["total_drift"]
+            )
+        else:
+            logger.info("Balances reconciled: %d accounts, no drift", report["accounts_checked"])
@@ -0,0 +1,126 @@
+"""Pre-serialized weekly class schedule"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.models import DanceClass, DanceStyle, ClassLevel, Instructor, User
+from app.services.invalidation import invalidation_bus, ClassChanged, TransportReconnected, UserChanged
+
+
+async def build_schedule(db: AsyncSession) -> list:
+    """Load the active class schedule with style, level and instructor names"""
+    query = (
+        select(DanceClass, DanceStyle, ClassLevel, Instructor, User)
+        .join(DanceStyle, DanceClass.style_id == DanceStyle.id, isouter=True)
+        .join(ClassLevel, DanceClass.level_id == ClassLevel.id, isouter=True)
+        .join(Instructor, DanceClass.instructor_id == Instructor.id, isouter=True)
+        .join(User, Instructor.user_id == User.id, isouter=True)
+        .where(DanceClass.is_active == True)
+        .order_by(DanceClass.day_of_week, DanceClass.start_time)
+    )
+
+    result = await db.execute(query)
+    rows = result.all()
+
+    schedule = []
+    for dance_class, style, level, instructor, user in rows:
+        schedule.append({
+            "id": str(dance_class.id),
+            "name": dance_class.name,
+            "description": dance_class.description,
+            "style": style.name if style else None,
+            "level": level.name if level else None,
+            "instructor": f"{user.first_name} {user.last_name}" if user else None,
+            "day_of_week": dance_class.day_of_week,
+            "start_time": str(dance_class.start_time),
+            "end_time": str(dance_class.end_time),
+            "studio_room": dance_class.studio_room,
+            "monthly_tuition": float(dance_class.monthly_tuition),
+            "max_capacity": dance_class.max_capacity
+        })
+
+    return schedule
+
+
+class ScheduleCache:
+    """Holds the schedule as encoded JSON bytes plus a strong ETag.
+
+    Rebuilt on the first request after invalidate() (class, style, level or
+    instructor writes) or once max_age_seconds has passed, which covers edits
+    made outside the API. Rebuilds read from the primary: the request that
+    triggers one can come from any client, and a lagging replica would have
+    pre-write data cached as fresh. A rebuild overtaken by invalidate() is
+    served but not kept.
+    """
+
+    def __init__(self, max_age_seconds: int):
+        self.max_age_seconds = max_age_seconds
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.hits = 0
+        self.rebuilds = 0
+        self._built_at = 0.0
+        self._generation = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _fresh(self) -> bool:
+        return self.body is not None and time.monotonic() - self._built_at < self.max_age_seconds
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self.body = None
+        self.etag = None
+
+    async def get(self, sessionmaker=AsyncSessionLocal) -> tuple:
+        """Return (body, etag), rebuilding once if stale even under concurrent requests"""
+        if self._fresh():
+            self.hits += 1
+            return self.body, self.etag
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._fresh():
+                return self.body, self.etag
+            generation = self._generation
+            async with sessionmaker() as db:
+                body = json.dumps(await build_schedule(db), separators=(",", ":")).encode()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            self.rebuilds += 1
+            if generation == self._generation:
+                self.body, self.etag = body, etag
+                self._built_at = time.monotonic()
+            return body, etag
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.rebuilds
+        return {
+            "name": "schedule",
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "bytes": len(self.body) if self.body else 0
+        }
+
+
+settings = get_settings()
+schedule_cache = ScheduleCache(max_age_seconds=settings.schedule_cache_max_age_seconds)
+
+
+
+def _on_user_change(event: UserChanged) -> None:
+    # Instructor names appear in the schedule
+    if event.role == "instructor":
+        schedule_cache.invalidate()
+
+
+invalidation_bus.subscribe(ClassChanged, lambda event: schedule_cache.invalidate())
+invalidation_bus.subscribe(UserChanged, _on_user_change)
+invalidation_bus.subscribe(TransportReconnected, lambda event: schedule_cache.invalidate())
@@ -0,0 +1,293 @@
+"""Chat session history stores for GeminiService"""
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.models import ChatSession
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_bytes(history: list) -> int:
+    """Approximate memory footprint of a history as its JSON-encoded size"""
+    return len(json.dumps(history, separators=(",", ":")))
+
+
+class SessionStore(ABC):
+    """Interface for chat history storage keyed by session id"""
+
+    backend = "base"
+
+    def __init__(self, idle_ttl_seconds: int, max_messages: int):
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_messages = max_messages
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    async def get(self, session_id: str) -> list:
+        ...
+
+    @abstractmethod
+    async def save(self, session_id: str, history: list) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+    async def append_turn(self, session_id: str, history: list, user_message: str, reply: str) -> None:
+        """Store history plus one user/model exchange, keeping only the newest messages"""
+        updated = history + [
+            {"role": "user", "parts": [{"text": user_message}]},
+            {"role": "model", "parts": [{"text": reply}]}
+        ]
+        await self.save(session_id, updated[-self.max_messages:])
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    async def live_stats(self) -> dict:
+        """Stats for the metrics endpoint; stores that share state across workers read it live"""
+        return self.stats()
+
+    def start(self) -> None:
+        """Start background maintenance, if the store needs any"""
+
+    async def stop(self) -> None:
+        """Stop background maintenance"""
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store with LRU, idle-TTL and total byte budget eviction"""
+
+    backend = "memory"
+
+    def __init__(self, idle_ttl_seconds: int, max_messages: int, max_sessions: int, max_bytes: int):
+        super().__init__(idle_ttl_seconds, max_messages)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # session_id -> (last_access, size_bytes, history)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _remove(self, session_id: str):
+        _, size, _ = self._sessions.pop(session_id)
+        self.total_bytes -= size
+
+    def _expire_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        # Oldest access first, so stop at the first live entry
+        while self._sessions:
+            session_id, (last_access, _, _) = next(iter(self._sessions.items()))
+            if last_access > cutoff:
+                break
+            self._remove(session_id)
+            self.expirations += 1
+
+    async def get(self, session_id: str) -> list:
+        self._expire_idle()
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return []
+        _, size, history = entry
+        self._sessions[session_id] = (time.monotonic(), size, history)
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        return list(history)
+
+    async def save(self, session_id: str, history: list) -> None:
+        if session_id in self._sessions:
+            self._remove(session_id)
+
+        size = estimate_bytes(history)
+        self._sessions[session_id] = (time.monotonic(), size, history)
+        self.total_bytes += size
+
+        self._expire_idle()
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._sessions))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def delete(self, session_id: str) -> None:
+        if session_id in self._sessions:
+            self._remove(session_id)
+
+    def stats(self) -> dict:
+        data = super().stats()
+        data.update({
+            "live_sessions": len(self._sessions),
+            "memory_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        })
+        return data
+
+
+class DatabaseSessionStore(SessionStore):
+    """Store backed by the chat_sessions table, shared by every worker.
+
+    A background task prunes the table every prune_interval_seconds: idle
+    sessions expire, then the least recently used rows beyond max_sessions
+    or beyond max_bytes of history are evicted, as in the memory store.
+    """
+
+    backend = "database"
+
+    def __init__(
+        self, idle_ttl_seconds: int, max_messages: int, max_sessions: int, max_bytes: int,
+        prune_interval_seconds: int = 300, live_stats_ttl_seconds: int = 15
+    ):
+        super().__init__(idle_ttl_seconds, max_messages)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.prune_interval_seconds = prune_interval_seconds
+        self.live_stats_ttl_seconds = live_stats_ttl_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._live = None
+        self._live_read_at = 0.0
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.idle_ttl_seconds)
+
+    async def get(self, session_id: str) -> list:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ChatSession.history).where(
+                    ChatSession.session_id == session_id,
+                    ChatSession.updated_at > self._cutoff()
+                )
+            )
+            history = result.scalar_one_or_none()
+        if history is None:
+            self.misses += 1
+            return []
+        self.hits += 1
+        return history
+
+    async def save(self, session_id: str, history: list) -> None:
+        now = datetime.utcnow()
+        statement = insert(ChatSession).values(
+            session_id=session_id,
+            history=history,
+            size_bytes=estimate_bytes(history),
+            updated_at=now
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ChatSession.session_id],
+            set_={
+                "history": statement.excluded.history,
+                "size_bytes": statement.excluded.size_bytes,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(statement)
+            await db.commit()
+
+    async def prune(self) -> None:
+        """Expire idle sessions, then evict the oldest beyond the count and byte budgets"""
+        newest_first = {"order_by": (ChatSession.updated_at.desc(), ChatSession.session_id)}
+        ranked = (
+            select(
+                ChatSession.session_id,
+                func.row_number().over(**newest_first).label("position"),
+                func.sum(func.coalesce(ChatSession.size_bytes, 0)).over(**newest_first).label("running_bytes")
+            )
+            .subquery()
+        )
+        over_budget = select(ranked.c.session_id).where(
+            or_(ranked.c.position > self.max_sessions, ranked.c.running_bytes > self.max_bytes)
+        )
+        async with AsyncSessionLocal() as db:
+            expired = await db.execute(delete(ChatSession).where(ChatSession.updated_at <= self._cutoff()))
+            evicted = await db.execute(delete(ChatSession).where(ChatSession.session_id.in_(over_budget)))
+            await db.commit()
+        self.expirations += expired.rowcount or 0
+        self.evictions += evicted.rowcount or 0
+
+    async def _run_pruner(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval_seconds)
+            try:
+                await self.prune()
+            except Exception:
+                logger.exception("Chat session prune failed")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run_pruner())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def delete(self, session_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(ChatSession).where(ChatSession.session_id == session_id))
+            await db.commit()
+
+    async def live_stats(self) -> dict:
+        """Stats including a live count and byte total read from the table.
+
+        The table scan is reused for live_stats_ttl_seconds so frequent
+        scrapes do not each count every session.
+        """
+        if self._live is None or time.monotonic() - self._live_read_at > self.live_stats_ttl_seconds:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(func.count(), func.coalesce(func.sum(ChatSession.size_bytes), 0))
+                    .where(ChatSession.updated_at > self._cutoff())
+                )
+                live_sessions, total_bytes = result.one()
+            self._live = {"live_sessions": live_sessions, "memory_bytes": int(total_bytes)}
+            self._live_read_at = time.monotonic()
+        data = self.stats()
+        data.update(self._live)
+        return data
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by settings.chat_session_backend"""
+    settings = get_settings()
+    if settings.chat_session_backend == "database":
+        return DatabaseSessionStore(
+            idle_ttl_seconds=settings.chat_session_idle_ttl_seconds,
+            max_messages=settings.chat_session_max_messages,
+            max_sessions=settings.chat_session_max_sessions,
+            max_bytes=settings.chat_session_max_bytes
+        )
+    if settings.chat_session_backend != "memory":
+        raise ValueError(f"Unknown chat_session_backend: {settings.chat_session_backend}")
+    return MemorySessionStore(
+        idle_ttl_seconds=settings.chat_session_idle_ttl_seconds,
+        max_messages=settings.chat_session_max_messages,
+        max_sessions=settings.chat_session_max_sessions,
+        max_bytes=settings.chat_session_max_bytes
+    )
@@ -0,0 +1,205 @@
+"""Bulk monthly tuition billing run"""
+import time
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, func, literal, cast, String
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import engine
+from app.models.models import Account, BillingRun, DanceClass, Enrollment, Student, Transaction
+from app.services.ledger_service import lock_accounts
+
+
+def period_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def tuition_key_prefix(period: date) -> str:
+    return f"tuition:{period.isoformat()}:"
+
+
+async def _bill_accounts(db: AsyncSession, account_ids: list, period: date, due_date: date, created_by) -> tuple:
+    """Charge tuition for every active enrollment under the given accounts.
+
+    One statement: the INSERT ... SELECT skips enrollments already billed for
+    the period (unique idempotency key), and only the rows it actually
+    inserted feed the balance UPDATE, so re-running a batch is a no-op.
+    Returns (accounts charged, transactions created, amount billed).
+    """
+    await lock_accounts(db, account_ids)
+    label = period.strftime("%B %Y")
+    billable = (
+        select(
+            func.gen_random_uuid(),
+            Account.id,
+            Student.id,
+            DanceClass.monthly_tuition,
+            literal("tuition"),
+            func.concat("Tuition - ", DanceClass.name, " (", label, ")"),
+            literal("completed"),
+            literal(due_date, Transaction.due_date.type),
+            func.concat(tuition_key_prefix(period), cast(Enrollment.id, String)),
+            func.now(),
+            literal(created_by, Transaction.created_by.type)
+        )
+        .select_from(Enrollment)
+        .join(DanceClass, Enrollment.class_id == DanceClass.id)
+        .join(Student, Enrollment.student_id == Student.id)
+        .join(Account, Account.parent_id == Student.parent_id)
+        .where(
+            and_(
+                Account.id.in_(account_ids),
+                Enrollment.status == "active",
+                Student.is_active == True,
+                DanceClass.monthly_tuition > 0
+            )
+        )
+    )
+
+    inserted = (
+        insert(Transaction)
+        .from_select(
+            [
+                Transaction.id, Transaction.account_id, Transaction.student_id,
+                Transaction.amount, Transaction.transaction_type, Transaction.description,
+                Transaction.status, Transaction.due_date, Transaction.idempotency_key,
+                Transaction.created_at, Transaction.created_by
+            ],
+            billable
+        )
+        .on_conflict_do_nothing(index_elements=[Transaction.idempotency_key])
+        .returning(Transaction.account_id, Transaction.amount)
+        .cte("inserted")
+    )
+    totals = (
+        select(
+            inserted.c.account_id,
+            func.sum(inserted.c.amount).label("total"),
+            func.count().label("charges")
+        )
+        .group_by(inserted.c.account_id)
+        .cte("totals")
+    )
+    result = await db.execute(
+        update(Account)
+        .where(Account.id == totals.c.account_id)
+        .values(
+            current_balance=func.coalesce(Account.current_balance, 0) + totals.c.total,
+            total_charges=Account.total_charges + totals.c.total,
+            last_activity_at=func.now(),
+            updated_at=func.now()
+        )
+        .returning(totals.c.charges, totals.c.total)
+    )
+    rows = result.all()
+    return (
+        len(rows),
+        sum(charges for charges, _ in rows),
+        sum((total for _, total in rows), Decimal("0"))
+    )
+
+
+class BillingRunInProgressError(Exception):
+    """Another runner holds the billing lock for this period"""
+
+
+def _run_lock_key(period: date):
+    return func.hashtext(f"tuition_run:{period.isoformat()}")
+
+
+async def run_tuition_billing(db: AsyncSession, period: date, due_day: int, batch_size: int, created_by=None) -> dict:
+    """Bill monthly tuition for every account, resumable and idempotent per period.
+
+    One runner per period: a session-level advisory lock, held on its own
+    connection across the batch commits, makes a concurrent run raise
+    BillingRunInProgressError; a crashed runner's lock goes with its
+    connection, so the period can be resumed.
+    """
+    period = period_start(period)
+    async with engine.connect() as lock_conn:
+        locked = await lock_conn.scalar(select(func.pg_try_advisory_lock(_run_lock_key(period))))
+        await lock_conn.commit()
+        if not locked:
+            raise BillingRunInProgressError()
+        try:
+            return await _run_locked(db, period, due_day, batch_size, created_by)
+        finally:
+            await lock_conn.execute(select(func.pg_advisory_unlock(_run_lock_key(period))))
+            await lock_conn.commit()
+
+
+async def _run_locked(db: AsyncSession, period: date, due_day: int, batch_size: int, created_by) -> dict:
+    """The run itself, under the period lock.
+
+    Accounts are processed in id order, one committed batch at a time; the
+    billing_runs row records the last committed account id so a crashed run
+    resumes where it stopped. Running a completed period again bills nothing.
+    """
+    due_date = period.replace(day=min(due_day, 28))
+
+    await db.execute(
+        insert(BillingRun)
+        .values(period=period, status="running", accounts_billed=0, charges_created=0,
+                amount_billed=Decimal("0"), created_by=created_by)
+        .on_conflict_do_nothing(index_elements=[BillingRun.period])
+    )
+    await db.commit()
+    run = await db.scalar(select(BillingRun).where(BillingRun.period == period))
+    if run.status == "completed":
+        return {**_run_summary(run), "already_completed": True}
+
+    started = time.perf_counter()
+    processed = 0
+    last_account_id = run.last_account_id
+    while True:
+        query = select(Account.id).order_by(Account.id).limit(batch_size)
+        if last_account_id is not None:
+            query = query.where(Account.id > last_account_id)
+        account_ids = (await db.execute(query)).scalars().all()
+        if not account_ids:
+            break
+
+        charged, charges, amount = await _bill_accounts(db, account_ids, period, due_date, created_by)
+        last_account_id = account_ids[-1]
+        await db.execute(
+            update(BillingRun)
+            .where(BillingRun.id == run.id)
+            .values(
+                last_account_id=last_account_id,
+                accounts_billed=BillingRun.accounts_billed + charged,
+                charges_created=BillingRun.charges_created + charges,
+                amount_billed=BillingRun.amount_billed + amount
+            )
+        )
+        await db.commit()
+        processed += len(account_ids)
+
+    await db.execute(
+        update(BillingRun).where(BillingRun.id == run.id).values(status="completed", completed_at=func.now())
+    )
+    await db.commit()
+    run = await db.scalar(
+        select(BillingRun).where(BillingRun.id == run.id).execution_options(populate_existing=True)
+    )
+
+    elapsed = time.perf_counter() - started
+    return {
+        **_run_summary(run),
+        "already_completed": False,
+        "accounts_scanned": processed,
+        "elapsed_seconds": round(elapsed, 3),
+        "accounts_per_second": round(processed / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def _run_summary(run: BillingRun) -> dict:
+    return {
+        "period": run.period.isoformat(),
+        "status": run.status,
+        "accounts_billed": run.accounts_billed,
+        "charges_created": run.charges_created,
+        "amount_billed": float(run.amount_billed),
+        "completed_at": run.completed_at.isoformat() if run.completed_at else None
+    }
@@ -0,0 +1,212 @@
+"""Compare batch enrollment with one request per (student, class) pair.
+
+Seeds F families with K kids each and a set of classes, then simulates
+registration opening: every family enrolls each kid in C random classes at
+the same time, either the way the single-pair route does it (one session,
+student and parent lookups and a commit per pair) or with one batch per
+family. Reports wall time, pairs/s, per-family latency and the number of
+statements, and checks that enrolled_count matches the active enrollments.
+The seed data is removed afterwards.
+
+    cd backend && python -m scripts.benchmark_enrollment --families 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.models.models import Parent, Student
+from app.services import enrollment_service
+from app.services.db_instrumentation import instrument_engine, start_request
+
+
+async def seed(tag: str, families: int, kids: int, classes: int, capacity: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+                "SELECT gen_random_uuid(), 'enroll-benchmark-' || :tag || '-' || n || '@example.invalid', "
+                "'x', 'Family', n::text, 'parent' FROM generate_series(1, :families) AS n"
+            ),
+            {"tag": tag, "families": families}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO parents (id, user_id) SELECT gen_random_uuid(), id FROM users "
+                "WHERE email LIKE 'enroll-benchmark-' || :tag || '-%'"
+            ),
+            {"tag": tag}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO students (id, parent_id, first_name, last_name) "
+                "SELECT gen_random_uuid(), p.id, 'Kid ' || k, u.last_name FROM parents p "
+                "JOIN users u ON u.id = p.user_id CROSS JOIN generate_series(1, :kids) AS k "
+                "WHERE u.email LIKE 'enroll-benchmark-' || :tag || '-%'"
+            ),
+            {"tag": tag, "kids": kids}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO classes (id, name, max_capacity, enrolled_count, is_active) "
+                "SELECT gen_random_uuid(), 'Enroll benchmark ' || :tag || ' ' || n, :capacity, 0, true "
+                "FROM generate_series(1, :classes) AS n"
+            ),
+            {"tag": tag, "capacity": capacity, "classes": classes}
+        )
+        await db.commit()
+
+
+async def load_requests(tag: str, classes_per_kid: int, rng: random.Random) -> list:
+    """One (user_id, [(student_id, class_id), ...]) per family"""
+    async with AsyncSessionLocal() as db:
+        class_ids = list((await db.execute(
+            text("SELECT id FROM classes WHERE name LIKE 'Enroll benchmark ' || :tag || ' %'"), {"tag": tag}
+        )).scalars())
+        rows = (await db.execute(
+            text(
+                "SELECT u.id, s.id FROM users u JOIN parents p ON p.user_id = u.id "
+                "JOIN students s ON s.parent_id = p.id "
+                "WHERE u.email LIKE 'enroll-benchmark-' || :tag || '-%' ORDER BY u.id, s.id"
+            ),
+            {"tag": tag}
+        )).all()
+    families = {}
+    for user_id, student_id in rows:
+        families.setdefault(user_id, []).extend(
+            (student_id, class_id) for class_id in rng.sample(class_ids, classes_per_kid)
+        )
+    requests = list(families.items())
+    rng.shuffle(requests)
+    return requests
+
+
+async def reset(tag: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "DELETE FROM enrollments WHERE class_id IN "
+                "(SELECT id FROM classes WHERE name LIKE 'Enroll benchmark ' || :tag || ' %')"
+            ),
+            {"tag": tag}
+        )
+        await db.execute(
+            text("UPDATE classes SET enrolled_count = 0 WHERE name LIKE 'Enroll benchmark ' || :tag || ' %'"),
+            {"tag": tag}
+        )
+        await db.commit()
+
+
+async def check_counts(tag: str) -> int:
+    """Classes whose enrolled_count disagrees with their active enrollments"""
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            text(
+                "SELECT count(*) FROM classes c WHERE c.name LIKE 'Enroll benchmark ' || :tag || ' %' "
+                "AND c.enrolled_count <> (SELECT count(*) FROM enrollments e "
+                "WHERE e.class_id = c.id AND e.status = 'active')"
+            ),
+            {"tag": tag}
+        )).scalar_one()
+
+
+async def cleanup(tag: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM classes WHERE name LIKE 'Enroll benchmark ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM users WHERE email LIKE 'enroll-benchmark-' || :tag || '-%'"), {"tag": tag})
+        await db.commit()
+
+
+async def enroll_sequential(user_id, pairs: list, waitlist: bool) -> list:
+    """What a client does today: one enroll request per pair"""
+    outcomes = []
+    for student_id, class_id in pairs:
+        async with AsyncSessionLocal() as db:
+            student = (await db.execute(select(Student).where(Student.id == student_id))).scalar_one()
+            parent = (await db.execute(select(Parent).where(Parent.user_id == user_id))).scalar_one()
+            assert student.parent_id == parent.id
+            try:
+                outcomes.append(await enrollment_service.enroll(db, student_id, class_id, allow_waitlist=waitlist))
+            except enrollment_service.EnrollmentError:
+                await db.rollback()
+                outcomes.append(enrollment_service.REJECTED)
+                continue
+            await db.commit()
+    return outcomes
+
+
+async def enroll_batch(user_id, pairs: list, waitlist: bool) -> list:
+    async with AsyncSessionLocal() as db:
+        parent_id = (await db.execute(select(Parent.id).where(Parent.user_id == user_id))).scalar_one()
+        results = await enrollment_service.enroll_batch(db, pairs, parent_id=parent_id, allow_waitlist=waitlist)
+        await db.commit()
+    return [result["status"] for result in results]
+
+
+async def run(mode, requests: list, concurrency: int, waitlist: bool) -> tuple:
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    outcomes = []
+
+    async def family(user_id, pairs):
+        async with gate:
+            started = time.perf_counter()
+            outcomes.extend(await mode(user_id, pairs, waitlist))
+            latencies.append(time.perf_counter() - started)
+
+    stats = start_request()
+    started = time.perf_counter()
+    await asyncio.gather(*(family(user_id, pairs) for user_id, pairs in requests))
+    return time.perf_counter() - started, latencies, outcomes, stats.count
+
+
+def report(name: str, elapsed: float, latencies: list, outcomes: list, queries: int, drift: int) -> None:
+    latencies.sort()
+    p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+    tally = {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))}
+    print(
+        f"{name:>10}: {elapsed:6.2f}s  {len(outcomes) / elapsed:8,.0f} pairs/s  "
+        f"family p50 {statistics.median(latencies) * 1000:6.0f} ms  p95 {p95 * 1000:6.0f} ms  "
+        f"{queries:,} statements  {tally}  count drift: {drift} classes"
+    )
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    if not get_settings().db_instrumentation:
+        instrument_engine(engine, slow_query_ms=10_000)
+    print(
+        f"Seeding {args.families} families x {args.kids} kids, {args.classes} classes "
+        f"of {args.capacity} seats (run {tag})..."
+    )
+    await seed(tag, args.families, args.kids, args.classes, args.capacity)
+    try:
+        requests = await load_requests(tag, args.classes_per_kid, random.Random(args.seed))
+        pairs = sum(len(family_pairs) for _, family_pairs in requests)
+        print(f"{pairs:,} pairs, {len(requests)} families registering {args.concurrency} at a time")
+        for name, mode in (("sequential", enroll_sequential), ("batch", enroll_batch)):
+            await reset(tag)
+            elapsed, latencies, outcomes, queries = await run(mode, requests, args.concurrency, args.waitlist)
+            report(name, elapsed, latencies, outcomes, queries, await check_counts(tag))
+    finally:
+        await cleanup(tag)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--families", type=int, default=200)
+    parser.add_argument("--kids", type=int, default=3)
+    parser.add_argument("--classes-per-kid", type=int, default=2)
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--waitlist", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
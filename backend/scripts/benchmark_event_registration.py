@@ -0,0 +1,194 @@
+"""Measure team registration throughput for an event with an entry fee.
+
+Seeds a team of N students spread over F families, then registers the whole
+team for a fresh event twice: once student by student the way the single
+registration route does it (student, event and duplicate lookups, then an
+insert, plus the fee charge and balance update it lacks, one commit per
+student), and once with the bulk registration service in a single commit.
+Reports students/s, statements, and checks that every student was
+registered and charged once and that account balances still match their
+ledgers. The seed data is removed afterwards.
+
+    cd backend && python -m scripts.benchmark_event_registration --students 300 --runs 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select, and_, text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.models.models import Event, EventParticipant, Student, Transaction
+from app.services import event_registration, ledger_service
+from app.services.db_instrumentation import instrument_engine, start_request
+
+ENTRY_FEE = Decimal("45.00")
+
+
+async def seed(tag: str, students: int, families: int) -> list:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+                "SELECT gen_random_uuid(), 'team-benchmark-' || :tag || '-' || n || '@example.invalid', "
+                "'x', 'Family', n::text, 'parent' FROM generate_series(1, :families) AS n"
+            ),
+            {"tag": tag, "families": families}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO parents (id, user_id) SELECT gen_random_uuid(), id FROM users "
+                "WHERE email LIKE 'team-benchmark-' || :tag || '-%'"
+            ),
+            {"tag": tag}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO accounts (id, parent_id, current_balance, total_charges, total_payments, total_credits) "
+                "SELECT gen_random_uuid(), p.id, 0, 0, 0, 0 FROM parents p JOIN users u ON u.id = p.user_id "
+                "WHERE u.email LIKE 'team-benchmark-' || :tag || '-%'"
+            ),
+            {"tag": tag}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO students (id, parent_id, first_name, last_name) "
+                "SELECT gen_random_uuid(), f.id, 'Dancer ' || n, f.last_name "
+                "FROM generate_series(1, :students) AS n "
+                "JOIN (SELECT p.id, u.last_name, row_number() OVER (ORDER BY p.id) - 1 AS slot "
+                "      FROM parents p JOIN users u ON u.id = p.user_id "
+                "      WHERE u.email LIKE 'team-benchmark-' || :tag || '-%') AS f "
+                "ON f.slot = n % :families"
+            ),
+            {"tag": tag, "students": students, "families": families}
+        )
+        student_ids = list((await db.execute(
+            text(
+                "SELECT s.id FROM students s JOIN parents p ON p.id = s.parent_id "
+                "JOIN users u ON u.id = p.user_id WHERE u.email LIKE 'team-benchmark-' || :tag || '-%'"
+            ),
+            {"tag": tag}
+        )).scalars())
+        await db.commit()
+    return student_ids
+
+
+async def create_event(tag: str, name: str):
+    async with AsyncSessionLocal() as db:
+        event = Event(
+            title=f"Team benchmark {tag} {name}",
+            event_type="competition",
+            start_date=date.today() + timedelta(days=30),
+            registration_deadline=date.today() + timedelta(days=14),
+            entry_fee=ENTRY_FEE,
+            is_active=True
+        )
+        db.add(event)
+        await db.commit()
+        return event.id
+
+
+async def register_sequential(event_id, student_ids: list, created_by) -> None:
+    """The single registration route, once per student, with the fee charge added"""
+    for student_id in student_ids:
+        async with AsyncSessionLocal() as db:
+            student = (await db.execute(select(Student).where(Student.id == student_id))).scalar_one()
+            event = (await db.execute(select(Event).where(Event.id == event_id))).scalar_one()
+            assert not event.registration_deadline or date.today() <= event.registration_deadline
+            existing = await db.execute(
+                select(EventParticipant).where(
+                    and_(EventParticipant.event_id == event_id, EventParticipant.student_id == student_id)
+                )
+            )
+            assert existing.scalar_one_or_none() is None
+            db.add(EventParticipant(event_id=event_id, student_id=student_id, registration_date=date.today()))
+            account = (await db.execute(
+                text("SELECT id FROM accounts WHERE parent_id = :parent_id"), {"parent_id": student.parent_id}
+            )).scalar_one()
+            await ledger_service.apply_delta(db, account, event.entry_fee, "competition")
+            db.add(Transaction(
+                account_id=account,
+                student_id=student_id,
+                amount=event.entry_fee,
+                transaction_type="competition",
+                description=f"Entry fee - {event.title}",
+                status="completed",
+                idempotency_key=event_registration.fee_key(event_id, student_id),
+                created_by=created_by
+            ))
+            await db.commit()
+
+
+async def register_batch(event_id, student_ids: list, created_by) -> None:
+    async with AsyncSessionLocal() as db:
+        summary = await event_registration.register_batch(db, event_id, student_ids, created_by=created_by)
+        assert summary["registered"] == len(student_ids)
+        await db.commit()
+
+
+async def verify(tag: str, event_id, students: int) -> str:
+    async with AsyncSessionLocal() as db:
+        registered = (await db.execute(
+            text("SELECT count(*) FROM event_participants WHERE event_id = :event_id"), {"event_id": event_id}
+        )).scalar_one()
+        charged = (await db.execute(
+            text("SELECT count(*), coalesce(sum(amount), 0) FROM transactions WHERE idempotency_key LIKE :key"),
+            {"key": f"event:{event_id}:%"}
+        )).one()
+        drift = (await db.execute(
+            text(
+                "SELECT count(*) FROM accounts a JOIN parents p ON p.id = a.parent_id "
+                "JOIN users u ON u.id = p.user_id WHERE u.email LIKE 'team-benchmark-' || :tag || '-%' "
+                "AND a.current_balance <> (SELECT coalesce(sum(t.amount), 0) FROM transactions t "
+                "WHERE t.account_id = a.id AND t.status = 'completed')"
+            ),
+            {"tag": tag}
+        )).scalar_one()
+    ok = registered == students and charged[0] == students and charged[1] == ENTRY_FEE * students and drift == 0
+    return f"{registered} registered, {charged[0]} fees ({charged[1]}), {drift} balances off -> {'ok' if ok else 'MISMATCH'}"
+
+
+async def cleanup(tag: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM events WHERE title LIKE 'Team benchmark ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM users WHERE email LIKE 'team-benchmark-' || :tag || '-%'"), {"tag": tag})
+        await db.commit()
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    if not get_settings().db_instrumentation:
+        instrument_engine(engine, slow_query_ms=10_000)
+    print(f"Seeding a team of {args.students} students from {args.families} families (run {tag})...")
+    student_ids = await seed(tag, args.students, args.families)
+    try:
+        for name, mode in (("sequential", register_sequential), ("batch", register_batch)):
+            timings = []
+            for run in range(args.runs):
+                event_id = await create_event(tag, f"{name} {run}")
+                stats = start_request()
+                started = time.perf_counter()
+                await mode(event_id, student_ids, None)
+                timings.append(time.perf_counter() - started)
+                check = await verify(tag, event_id, len(student_ids))
+            best, median = min(timings), statistics.median(timings)
+            print(
+                f"{name:>10}: median {median * 1000:8.1f} ms  best {best * 1000:8.1f} ms  "
+                f"{len(student_ids) / median:8,.0f} students/s  {stats.count:,} statements/run  {check}"
+            )
+    finally:
+        await cleanup(tag)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--families", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""Measure memory while streaming a large transaction export.
+
+Seeds N transactions on a throwaway account, runs the same server-side
+cursor export the /billing/transactions/export route uses, and samples the
+process RSS as rows stream. Memory should level off after the first batch
+and stay flat to the end. The seed data is removed afterwards.
+
+    cd backend && python -m scripts.benchmark_export --rows 1000000 --format csv
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.api.billing import TRANSACTION_COLUMNS
+from app.database import AsyncSessionLocal, engine
+from app.models.models import Transaction
+from app.services.exports import stream_query
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux)"""
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * 4096 / 1024 / 1024
+
+
+async def seed(rows: int) -> tuple:
+    user_id, parent_id, account_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+                "VALUES (:id, :email, 'x', 'Export', 'Benchmark', 'parent')"
+            ),
+            {"id": user_id, "email": f"export-benchmark-{user_id}@example.invalid"}
+        )
+        await db.execute(
+            text("INSERT INTO parents (id, user_id) VALUES (:id, :user_id)"),
+            {"id": parent_id, "user_id": user_id}
+        )
+        await db.execute(
+            text("INSERT INTO accounts (id, parent_id) VALUES (:id, :parent_id)"),
+            {"id": account_id, "parent_id": parent_id}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO transactions (account_id, amount, transaction_type, description, status, created_at) "
+                "SELECT :account_id, (n % 500) + 0.25, 'charge', 'Benchmark charge ' || n, 'completed', "
+                "now() - make_interval(secs => n) FROM generate_series(1, :rows) AS n"
+            ),
+            {"account_id": account_id, "rows": rows}
+        )
+        await db.commit()
+    return user_id, account_id
+
+
+async def cleanup(user_id, account_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM accounts WHERE id = :id"), {"id": account_id})
+        await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await db.commit()
+
+
+async def main(rows: int, fmt: str, samples: int) -> None:
+    print(f"Seeding {rows:,} transactions...")
+    user_id, account_id = await seed(rows)
+    try:
+        query = (
+            select(
+                Transaction.id, Transaction.account_id, Transaction.student_id, Transaction.amount,
+                Transaction.transaction_type, Transaction.description, Transaction.status,
+                Transaction.payment_method, Transaction.due_date, Transaction.paid_date,
+                Transaction.created_at
+            )
+            .where(Transaction.account_id == account_id)
+            .order_by(Transaction.created_at, Transaction.id)
+        )
+
+        baseline = rss_mb()
+        print(f"RSS before export: {baseline:.1f} MB")
+        every = max(rows // samples, 1)
+        streamed_bytes = 0
+        lines = 0
+        next_sample = every
+        peak = baseline
+        started = time.perf_counter()
+        async for chunk in stream_query(query, TRANSACTION_COLUMNS, fmt):
+            streamed_bytes += len(chunk)
+            lines += chunk.count(b"\n")
+            if lines >= next_sample:
+                current = rss_mb()
+                peak = max(peak, current)
+                print(f"  {lines:>10,} rows  {streamed_bytes / 1024 / 1024:>8.1f} MB sent  RSS {current:.1f} MB")
+                next_sample += every
+        elapsed = time.perf_counter() - started
+
+        print(
+            f"Exported {lines:,} lines ({streamed_bytes / 1024 / 1024:.1f} MB) in {elapsed:.1f}s, "
+            f"{lines / elapsed:,.0f} rows/s; peak RSS {peak:.1f} MB (+{peak - baseline:.1f} MB)"
+        )
+    finally:
+        await cleanup(user_id, account_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.format, args.samples))
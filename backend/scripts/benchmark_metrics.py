@@ -0,0 +1,67 @@
+"""Measure the per-request cost of the metrics middleware.
+
+Drives a minimal ASGI app directly (no network, no FastAPI routing) with
+and without MetricsMiddleware, so the difference is the collection cost
+alone: one perf_counter pair, a histogram bisect and two dict updates.
+The figure depends on the CPU and interpreter, which are printed with it;
+quote them together.
+
+    cd backend && python -m scripts.benchmark_metrics --requests 200000
+"""
+import argparse
+import asyncio
+import os
+import platform
+import time
+
+from app.services.metrics import MetricsMiddleware, RequestMetrics
+
+
+class _Route:
+    path = "/api/classes/{class_id}"
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests: int) -> float:
+    """Seconds per request"""
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/api/classes/x"}, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int, rounds: int) -> None:
+    metrics = RequestMetrics()
+    instrumented = MetricsMiddleware(bare_app, metrics)
+    await drive(bare_app, 1000)
+    await drive(instrumented, 1000)
+
+    baseline = min([await drive(bare_app, requests) for _ in range(rounds)])
+    with_metrics = min([await drive(instrumented, requests) for _ in range(rounds)])
+
+    print(f"bare app:          {baseline * 1e6:6.2f} us/request")
+    print(f"with metrics:      {with_metrics * 1e6:6.2f} us/request")
+    print(f"middleware cost:   {(with_metrics - baseline) * 1e6:6.2f} us/request")
+    print(f"platform:          Python {platform.python_version()} on {platform.machine()}, {os.cpu_count()} CPU(s)")
+    print(f"observations:      {sum(h.count for h in metrics.latency.values()):,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
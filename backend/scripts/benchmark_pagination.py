@@ -0,0 +1,129 @@
+"""Compare shallow and deep page latency for OFFSET and keyset pagination.
+
+Seeds one account with enough transactions for P pages (ties in created_at
+included, so the id tie-break is exercised) and times page 1 and page P of
+the parent transaction listing, built with paginate_newest_first exactly as
+GET /billing/transactions does: once with skip (OFFSET) and once with the
+cursor of the previous page. OFFSET has to walk every skipped row, so its
+deep page grows with P; keyset starts each page with an index range scan and
+should cost about the same at any depth. Both must return the same rows. The
+seed data is removed afterwards.
+
+    cd backend && python -m scripts.benchmark_pagination --pages 10000 --page-size 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.database import AsyncSessionLocal, engine
+from app.models.models import Transaction
+from app.services.pagination import encode_cursor, paginate_newest_first
+
+
+async def seed(tag: str, rows: int) -> tuple:
+    user_id, parent_id, account_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+                "VALUES (:id, :email, 'x', 'Pagination', 'Benchmark', 'parent')"
+            ),
+            {"id": user_id, "email": f"pagination-benchmark-{tag}@example.invalid"}
+        )
+        await db.execute(
+            text("INSERT INTO parents (id, user_id) VALUES (:id, :user_id)"),
+            {"id": parent_id, "user_id": user_id}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO accounts (id, parent_id, current_balance, total_charges, total_payments, total_credits) "
+                "VALUES (:id, :parent_id, 0, 0, 0, 0)"
+            ),
+            {"id": account_id, "parent_id": parent_id}
+        )
+        # Three rows per second, so pages regularly split a created_at tie
+        await db.execute(
+            text(
+                "INSERT INTO transactions (id, account_id, amount, transaction_type, description, status, created_at) "
+                "SELECT gen_random_uuid(), :account_id, 10.00, 'tuition', 'Pagination benchmark', 'completed', "
+                "now() - (n / 3) * interval '1 second' FROM generate_series(1, :rows) AS n"
+            ),
+            {"account_id": account_id, "rows": rows}
+        )
+        await db.commit()
+        await db.execute(text("ANALYZE transactions"))
+        await db.commit()
+    return user_id, account_id
+
+
+async def cleanup(user_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await db.commit()
+
+
+def listing(account_id):
+    return select(Transaction).where(Transaction.account_id == account_id)
+
+
+async def fetch(account_id, cursor, skip: int, limit: int) -> tuple:
+    """(seconds, row ids) for one page in a fresh session, as a request would"""
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        result = await db.execute(paginate_newest_first(listing(account_id), Transaction, cursor, skip, limit))
+        rows = result.scalars().all()
+        return time.perf_counter() - started, [row.id for row in rows]
+
+
+async def cursor_before(account_id, skip: int):
+    """Cursor a client would hold after reading the first `skip` rows"""
+    if not skip:
+        return None
+    async with AsyncSessionLocal() as db:
+        last = (await db.execute(
+            paginate_newest_first(listing(account_id), Transaction, None, skip - 1, 1)
+        )).scalar_one()
+        return encode_cursor(last.created_at, last.id)
+
+
+async def time_page(account_id, page: int, limit: int, repeats: int) -> dict:
+    skip = (page - 1) * limit
+    cursor = await cursor_before(account_id, skip)
+    timings = {"offset": [], "keyset": []}
+    pages = {}
+    for _ in range(repeats):
+        for name, (page_cursor, page_skip) in {"offset": (None, skip), "keyset": (cursor, 0)}.items():
+            seconds, pages[name] = await fetch(account_id, page_cursor, page_skip, limit)
+            timings[name].append(seconds)
+    assert pages["offset"] == pages["keyset"], f"page {page}: OFFSET and keyset returned different rows"
+    assert len(pages["keyset"]) == limit, f"page {page} is short: {len(pages['keyset'])} rows"
+    return {name: statistics.median(samples) for name, samples in timings.items()}
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    user_id, account_id = await seed(tag, args.pages * args.page_size)
+    try:
+        await time_page(account_id, 1, args.page_size, 1)  # warm the pool and the cache
+        results = {page: await time_page(account_id, page, args.page_size, args.repeats) for page in (1, args.pages)}
+
+        print(f"{args.pages * args.page_size:,} transactions, {args.page_size} per page, median of {args.repeats}")
+        for page, timing in results.items():
+            print(f"page {page:>6,}:  OFFSET {timing['offset'] * 1000:8.2f} ms   keyset {timing['keyset'] * 1000:8.2f} ms")
+        for name in ("offset", "keyset"):
+            print(f"{name:<7} deep/shallow: {results[args.pages][name] / results[1][name]:6.1f}x")
+    finally:
+        await cleanup(user_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
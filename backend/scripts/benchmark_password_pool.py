@@ -0,0 +1,138 @@
+"""Measure how a burst of logins affects the latency of unrelated endpoints.
+
+Drives the real app in-process (httpx ASGI transport, no network) with one
+seeded user. A prober requests cheap unrelated routes (/health and the class
+schedule) back to back, first on an idle app, then while N logins run
+concurrently. With bcrypt on the password pool the prober's p99 should stay
+close to idle; --inline repeats the burst with verification run on the event
+loop (the old behaviour) for comparison. Logins shed with 503 are counted.
+The seed data is removed afterwards.
+
+    cd backend && python -m scripts.benchmark_password_pool --logins 50 --inline
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.api import auth as auth_routes
+from app.auth import create_access_token, get_password_hash, verify_password
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+
+PASSWORD = "benchmark-password"
+PROBE_PATHS = ("/health", "/api/classes/schedule")
+
+
+async def seed(tag: str) -> tuple:
+    user_id, email = uuid.uuid4(), f"password-benchmark-{tag}@example.invalid"
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role, is_active) "
+                "VALUES (:id, :email, :password_hash, 'Password', 'Benchmark', 'parent', true)"
+            ),
+            {"id": user_id, "email": email, "password_hash": get_password_hash(PASSWORD)}
+        )
+        await db.commit()
+    return user_id, email
+
+
+async def cleanup(user_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await db.commit()
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def probe(client: httpx.AsyncClient, email: str, stop: asyncio.Event, latencies: list) -> None:
+    """Hit the unrelated routes in turn, as the seeded user, until stop is set"""
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': email})}"}
+    turn = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(PROBE_PATHS[turn % len(PROBE_PATHS)], headers=headers)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+        turn += 1
+
+
+async def login(client: httpx.AsyncClient, email: str) -> int:
+    response = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    return response.status_code
+
+
+async def run_phase(client: httpx.AsyncClient, email: str, logins: int, idle_seconds: float) -> dict:
+    """Probe latencies while `logins` logins run at once (or for idle_seconds when logins is 0)"""
+    latencies = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(client, email, stop, latencies))
+    started = time.perf_counter()
+    if logins:
+        statuses = await asyncio.gather(*(login(client, email) for _ in range(logins)))
+    else:
+        statuses = []
+        await asyncio.sleep(idle_seconds)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+    return {
+        "elapsed": elapsed,
+        "probes": len(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+        "ok": statuses.count(200),
+        "shed": statuses.count(503)
+    }
+
+
+def report(name: str, phase: dict) -> None:
+    print(
+        f"{name:<14} probes {phase['probes']:>6}  p50 {phase['p50'] * 1000:7.2f} ms  "
+        f"p99 {phase['p99'] * 1000:7.2f} ms  max {phase['max'] * 1000:7.2f} ms  "
+        f"logins ok {phase['ok']:>3} shed {phase['shed']:>3} in {phase['elapsed']:.2f}s"
+    )
+
+
+async def verify_on_loop(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    user_id, email = await seed(tag)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await run_phase(client, email, 0, 0.5)  # warm the pool and the schedule cache
+            idle = await run_phase(client, email, 0, args.idle_seconds)
+            report("idle", idle)
+            pooled = await run_phase(client, email, args.logins, 0)
+            report("password pool", pooled)
+            if args.inline:
+                pooled_verify = auth_routes.verify_password_async
+                auth_routes.verify_password_async = verify_on_loop
+                try:
+                    report("on event loop", await run_phase(client, email, args.logins, 0))
+                finally:
+                    auth_routes.verify_password_async = pooled_verify
+        print(f"p99 under {args.logins} logins: {pooled['p99'] / idle['p99']:.1f}x idle")
+    finally:
+        await cleanup(user_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    parser.add_argument("--inline", action="store_true")
+    asyncio.run(main(parser.parse_args()))
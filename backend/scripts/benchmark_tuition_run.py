@@ -0,0 +1,169 @@
+"""Benchmark the monthly tuition run on seeded families.
+
+Seeds F families with K kids each, every kid enrolled in C of a set of
+priced classes, and bills one period over just those accounts the way
+run_tuition_billing does: accounts in id order, one committed
+INSERT ... SELECT / balance UPDATE batch at a time. Reports accounts/s and
+charges/s per batch size, then bills the period again to time the
+idempotent no-op pass. Fails unless every active enrollment was charged
+exactly once and each balance equals its charges. The seed data is removed
+afterwards.
+
+    cd backend && python -m scripts.benchmark_tuition_run --families 2000 --batch-sizes 100,500,2000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.services.db_instrumentation import instrument_engine, start_request
+from app.services.tuition_billing import _bill_accounts, period_start
+
+
+async def seed(tag: str, families: int, kids: int, classes: int, classes_per_kid: int) -> None:
+    statements = [
+        "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+        "SELECT gen_random_uuid(), 'tuition-benchmark-' || :tag || '-' || n || '@example.invalid', "
+        "'x', 'Family', n::text, 'parent' FROM generate_series(1, :families) AS n",
+
+        "INSERT INTO parents (id, user_id) SELECT gen_random_uuid(), id FROM users "
+        "WHERE email LIKE 'tuition-benchmark-' || :tag || '-%'",
+
+        "INSERT INTO accounts (id, parent_id, current_balance, total_charges, total_payments, total_credits) "
+        "SELECT gen_random_uuid(), p.id, 0, 0, 0, 0 FROM parents p JOIN users u ON u.id = p.user_id "
+        "WHERE u.email LIKE 'tuition-benchmark-' || :tag || '-%'",
+
+        "INSERT INTO students (id, parent_id, first_name, last_name) "
+        "SELECT gen_random_uuid(), p.id, 'Kid ' || k, u.last_name FROM parents p "
+        "JOIN users u ON u.id = p.user_id CROSS JOIN generate_series(1, :kids) AS k "
+        "WHERE u.email LIKE 'tuition-benchmark-' || :tag || '-%'",
+
+        "INSERT INTO classes (id, name, max_capacity, enrolled_count, monthly_tuition, is_active) "
+        "SELECT gen_random_uuid(), 'Tuition benchmark ' || :tag || ' ' || n, 100000, 0, 60 + n % 5 * 10, true "
+        "FROM generate_series(1, :classes) AS n",
+
+        # Kid number i takes classes i+1 .. i+C (mod the class count)
+        "INSERT INTO enrollments (id, student_id, class_id, enrollment_date, status) "
+        "SELECT gen_random_uuid(), s.id, c.id, current_date, 'active' FROM "
+        "(SELECT s.id, row_number() OVER (ORDER BY s.id) AS i FROM students s "
+        " JOIN parents p ON p.id = s.parent_id JOIN users u ON u.id = p.user_id "
+        " WHERE u.email LIKE 'tuition-benchmark-' || :tag || '-%') s "
+        "CROSS JOIN generate_series(1, :classes_per_kid) AS k "
+        "JOIN classes c ON c.name = 'Tuition benchmark ' || :tag || ' ' || ((s.i + k) % :classes + 1)",
+
+        "ANALYZE accounts",
+        "ANALYZE enrollments",
+    ]
+    params = {
+        "tag": tag, "families": families, "kids": kids, "classes": classes, "classes_per_kid": classes_per_kid
+    }
+    async with AsyncSessionLocal() as db:
+        for statement in statements:
+            await db.execute(text(statement), params)
+        await db.commit()
+
+
+async def account_ids(tag: str) -> list:
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(
+            text(
+                "SELECT a.id FROM accounts a JOIN parents p ON p.id = a.parent_id JOIN users u ON u.id = p.user_id "
+                "WHERE u.email LIKE 'tuition-benchmark-' || :tag || '-%' ORDER BY a.id"
+            ),
+            {"tag": tag}
+        )).scalars())
+
+
+async def reset(ids: list) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM transactions WHERE account_id = ANY(:ids)"), {"ids": ids})
+        await db.execute(
+            text("UPDATE accounts SET current_balance = 0, total_charges = 0 WHERE id = ANY(:ids)"), {"ids": ids}
+        )
+        await db.commit()
+
+
+async def cleanup(tag: str, ids: list) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM transactions WHERE account_id = ANY(:ids)"), {"ids": ids})
+        await db.execute(text("DELETE FROM classes WHERE name LIKE 'Tuition benchmark ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM users WHERE email LIKE 'tuition-benchmark-' || :tag || '-%'"), {"tag": tag})
+        await db.commit()
+
+
+async def bill(ids: list, period: date, batch_size: int) -> tuple:
+    """(seconds, accounts charged, charges created, statements) for one pass"""
+    due_date = period.replace(day=min(get_settings().tuition_due_day, 28))
+    charged = charges = 0
+    stats = start_request()
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for offset in range(0, len(ids), batch_size):
+            batch_charged, batch_charges, _ = await _bill_accounts(
+                db, ids[offset:offset + batch_size], period, due_date, None
+            )
+            charged += batch_charged
+            charges += batch_charges
+            await db.commit()
+    return time.perf_counter() - started, charged, charges, stats.count
+
+
+async def check(ids: list, expected: int) -> None:
+    async with AsyncSessionLocal() as db:
+        charged, drifted = (await db.execute(
+            text(
+                "SELECT (SELECT count(*) FROM transactions WHERE account_id = ANY(:ids)), "
+                "(SELECT count(*) FROM accounts a WHERE a.id = ANY(:ids) AND a.current_balance <> "
+                "(SELECT coalesce(sum(t.amount), 0) FROM transactions t WHERE t.account_id = a.id))"
+            ),
+            {"ids": ids}
+        )).one()
+    assert charged == expected, f"{charged:,} tuition charges for {expected:,} active enrollments"
+    assert drifted == 0, f"{drifted} balances do not match their charges"
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    if not get_settings().db_instrumentation:
+        instrument_engine(engine, slow_query_ms=60_000)
+    period = period_start(date.today())
+    enrollments = args.families * args.kids * args.classes_per_kid
+    print(
+        f"Seeding {args.families:,} families x {args.kids} kids, {args.classes_per_kid} of {args.classes} "
+        f"classes each: {enrollments:,} enrollments (run {tag})..."
+    )
+    await seed(tag, args.families, args.kids, args.classes, args.classes_per_kid)
+    ids = await account_ids(tag)
+    try:
+        for batch_size in args.batch_sizes:
+            await reset(ids)
+            elapsed, charged, charges, statements = await bill(ids, period, batch_size)
+            await check(ids, enrollments)
+            rerun, _, recharged, _ = await bill(ids, period, batch_size)
+            assert recharged == 0, f"re-run created {recharged} charges"
+            print(
+                f"batch {batch_size:>5}: {elapsed:6.2f}s  {len(ids) / elapsed:8,.0f} accounts/s  "
+                f"{charges / elapsed:9,.0f} charges/s  {charged:,} accounts charged  "
+                f"{statements:,} statements  re-run {rerun:5.2f}s"
+            )
+    finally:
+        await cleanup(tag, ids)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--families", type=int, default=2000)
+    parser.add_argument("--kids", type=int, default=2)
+    parser.add_argument("--classes", type=int, default=40)
+    parser.add_argument("--classes-per-kid", type=int, default=3)
+    parser.add_argument(
+        "--batch-sizes", type=lambda value: [int(size) for size in value.split(",")],
+        default=[get_settings().tuition_billing_batch_size]
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""Query-count regression check for the parent dashboard.
+
+Seeds families of different sizes (students, enrollments, upcoming event
+registrations, transactions) and assembles each dashboard exactly as
+GET /dashboard/parent does, inside assert_max_queries(4). The count must
+not grow with the number of students or events; a return to per-student or
+per-event queries (N+1) fails the check. The seed data is removed afterwards.
+
+    cd backend && python -m scripts.check_dashboard_queries
+"""
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import select, text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.models.models import User
+from app.services.dashboard_service import (
+    UPCOMING_EVENTS_LIMIT, build_parent_dashboard, load_parent_and_account
+)
+from app.services.db_instrumentation import assert_max_queries, instrument_engine
+
+MAX_QUERIES = 4  # parent + account, students + enrollments, transactions, events + flags
+
+
+async def seed_family(tag: str, students: int, classes: int, events: int, transactions: int):
+    user_id, parent_id = uuid.uuid4(), uuid.uuid4()
+    params = {
+        "tag": tag, "family": user_id.hex, "user_id": user_id, "parent_id": parent_id, "students": students,
+        "classes": classes, "events": events, "transactions": transactions
+    }
+    statements = [
+        "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+        "VALUES (:user_id, 'dashboard-check-' || :tag || '-' || :family || '@example.invalid', "
+        "'x', 'Dashboard', 'Check', 'parent')",
+
+        "INSERT INTO parents (id, user_id) VALUES (:parent_id, :user_id)",
+
+        "INSERT INTO accounts (id, parent_id, current_balance, total_charges, total_payments, total_credits) "
+        "VALUES (gen_random_uuid(), :parent_id, 0, 0, 0, 0)",
+
+        "INSERT INTO students (id, parent_id, first_name, last_name) "
+        "SELECT gen_random_uuid(), :parent_id, 'Kid ' || n, 'Check' FROM generate_series(1, :students) AS n",
+
+        "INSERT INTO classes (id, name, day_of_week, start_time, end_time, max_capacity, enrolled_count, "
+        "monthly_tuition, is_active) "
+        "SELECT gen_random_uuid(), 'Dashboard check ' || :tag || ' ' || :family || ' ' || n, n % 7, "
+        "time '16:00', time '17:00', 20, 0, 80, true FROM generate_series(1, :classes) AS n",
+
+        "INSERT INTO enrollments (id, student_id, class_id, enrollment_date, status) "
+        "SELECT gen_random_uuid(), s.id, c.id, current_date, 'active' FROM students s "
+        "CROSS JOIN classes c WHERE s.parent_id = :parent_id "
+        "AND c.name LIKE 'Dashboard check ' || :tag || ' ' || :family || ' %'",
+
+        "INSERT INTO events (id, title, start_date, is_active) "
+        "SELECT gen_random_uuid(), 'Dashboard check ' || :tag || ' ' || :family || ' ' || n, "
+        "current_date + n, true FROM generate_series(1, :events) AS n",
+
+        "INSERT INTO event_participants (id, event_id, student_id, registration_date, fee_paid) "
+        "SELECT gen_random_uuid(), e.id, s.id, current_date, false FROM students s "
+        "CROSS JOIN events e WHERE s.parent_id = :parent_id "
+        "AND e.title LIKE 'Dashboard check ' || :tag || ' ' || :family || ' %'",
+
+        "INSERT INTO transactions (id, account_id, amount, transaction_type, description, status) "
+        "SELECT gen_random_uuid(), a.id, 25.00, 'tuition', 'Dashboard check', 'completed' "
+        "FROM accounts a CROSS JOIN generate_series(1, :transactions) AS n WHERE a.parent_id = :parent_id",
+    ]
+    async with AsyncSessionLocal() as db:
+        for statement in statements:
+            await db.execute(text(statement), params)
+        await db.commit()
+    return user_id
+
+
+async def cleanup(tag: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM classes WHERE name LIKE 'Dashboard check ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM events WHERE title LIKE 'Dashboard check ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM users WHERE email LIKE 'dashboard-check-' || :tag || '-%'"), {"tag": tag})
+        await db.commit()
+
+
+async def check(tag: str, user_id, students: int, classes: int, events: int) -> None:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
+        with assert_max_queries(MAX_QUERIES) as stats:
+            parent, account = await load_parent_and_account(db, user.id)
+            dashboard = await build_parent_dashboard(db, user, parent, account)
+
+    summary = dashboard["summary"]
+    assert summary["total_students"] == students, summary
+    assert summary["active_enrollments"] == students * classes, summary
+    assert summary["upcoming_events_count"] <= UPCOMING_EVENTS_LIMIT, summary
+    seeded = [event for event in dashboard["upcoming_events"] if event["title"].startswith(f"Dashboard check {tag}")]
+    assert all(event["is_registered"] for event in seeded), "registration flags are wrong"
+    print(
+        f"ok   {students:>2} students x {classes} classes, {events:>2} events: "
+        f"{stats.count} queries (budget {MAX_QUERIES})"
+    )
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    if not get_settings().db_instrumentation:
+        instrument_engine(engine, slow_query_ms=10_000)
+    shapes = [(1, 1, 1), (3, 2, 5), (args.students, args.classes, args.events)]
+    try:
+        for students, classes, events in shapes:
+            user_id = await seed_family(tag, students, classes, events, transactions=30)
+            await check(tag, user_id, students, classes, events)
+    finally:
+        await cleanup(tag)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=8)
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--events", type=int, default=12)
+    asyncio.run(main(parser.parse_args()))
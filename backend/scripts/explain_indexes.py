@@ -0,0 +1,285 @@
+"""Check that the hot queries are planned onto the indexes meant for them.
+
+Seeds a studio-sized data set (families, students, classes, enrollments,
+events, transactions, chat logs, announcements) and ANALYZEs it, then runs
+each hot query the way the app builds it, captures the SQL it sends, and
+EXPLAINs exactly that SQL with the same parameters. Each check fails unless the plan contains
+an Index, Index Only or Bitmap Index Scan on every index it names. Writes
+made while capturing are rolled back, and the seed data is removed
+afterwards.
+
+    cd backend && python -m scripts.explain_indexes --families 5000
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import event, func, select, text
+
+from app.database import AsyncSessionLocal, engine
+from app.models.models import ChatLog, DanceClass, Enrollment, Transaction
+from app.services import dashboard_service, enrollment_service
+from app.services.announcement_feed import build_feed
+from app.services.pagination import encode_cursor, paginate_newest_first
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+async def seed(tag: str, families: int, classes: int, events: int) -> None:
+    statements = [
+        "INSERT INTO users (id, email, password_hash, first_name, last_name, role, created_at) "
+        "SELECT gen_random_uuid(), 'explain-' || :tag || '-' || n || '@example.invalid', 'x', 'Family', n::text, "
+        "'parent', now() - make_interval(secs => n) FROM generate_series(1, :families) AS n",
+
+        "INSERT INTO parents (id, user_id) SELECT gen_random_uuid(), id FROM users "
+        "WHERE email LIKE 'explain-' || :tag || '-%'",
+
+        "INSERT INTO accounts (id, parent_id, current_balance, total_charges, total_payments, total_credits) "
+        "SELECT gen_random_uuid(), p.id, 0, 0, 0, 0 FROM parents p JOIN users u ON u.id = p.user_id "
+        "WHERE u.email LIKE 'explain-' || :tag || '-%'",
+
+        "INSERT INTO students (id, parent_id, first_name, last_name, created_at) "
+        "SELECT gen_random_uuid(), p.id, 'Kid ' || k, u.last_name, now() FROM parents p "
+        "JOIN users u ON u.id = p.user_id CROSS JOIN generate_series(1, 2) AS k "
+        "WHERE u.email LIKE 'explain-' || :tag || '-%'",
+
+        "INSERT INTO classes (id, name, day_of_week, start_time, max_capacity, enrolled_count, is_active) "
+        "SELECT gen_random_uuid(), 'Explain ' || :tag || ' ' || n, n % 7, "
+        "time '09:00' + make_interval(mins => (n % 40) * 15), 20, 0, n % 10 <> 0 "
+        "FROM generate_series(1, :classes) AS n",
+
+        "WITH s AS (SELECT s.id, row_number() OVER (ORDER BY s.id) AS rn FROM students s "
+        "           JOIN parents p ON p.id = s.parent_id JOIN users u ON u.id = p.user_id "
+        "           WHERE u.email LIKE 'explain-' || :tag || '-%'), "
+        "     c AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS slot FROM classes "
+        "           WHERE name LIKE 'Explain ' || :tag || ' %') "
+        "INSERT INTO enrollments (id, student_id, class_id, enrollment_date, status, created_at) "
+        "SELECT gen_random_uuid(), s.id, c.id, current_date - (s.rn % 200)::int, "
+        "CASE WHEN k = 0 THEN 'active' WHEN s.rn % 5 = 0 THEN 'waitlisted' "
+        "     WHEN s.rn % 7 = 0 THEN 'dropped' ELSE 'active' END, now() "
+        "FROM s CROSS JOIN generate_series(0, 1) AS k "
+        "JOIN c ON c.slot = (s.rn * 2 + k) % :classes",
+
+        "INSERT INTO events (id, title, start_date, end_date, is_active) "
+        "SELECT gen_random_uuid(), 'Explain ' || :tag || ' ' || n, current_date + (n - :events / 2), "
+        "current_date + (n - :events / 2), n % 8 <> 0 FROM generate_series(1, :events) AS n",
+
+        "WITH s AS (SELECT s.id, row_number() OVER (ORDER BY s.id) AS rn FROM students s "
+        "           JOIN parents p ON p.id = s.parent_id JOIN users u ON u.id = p.user_id "
+        "           WHERE u.email LIKE 'explain-' || :tag || '-%'), "
+        "     e AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS slot FROM events "
+        "           WHERE title LIKE 'Explain ' || :tag || ' %') "
+        "INSERT INTO event_participants (id, event_id, student_id, registration_date, fee_paid) "
+        "SELECT gen_random_uuid(), e.id, s.id, current_date, false FROM s JOIN e ON e.slot = s.rn % :events",
+
+        "INSERT INTO transactions (id, account_id, amount, transaction_type, description, status, created_at) "
+        "SELECT gen_random_uuid(), a.id, 25.00, 'tuition', 'Explain', 'completed', "
+        "now() - make_interval(hours => n) FROM accounts a JOIN parents p ON p.id = a.parent_id "
+        "JOIN users u ON u.id = p.user_id CROSS JOIN generate_series(1, 40) AS n "
+        "WHERE u.email LIKE 'explain-' || :tag || '-%'",
+
+        "INSERT INTO chat_logs (id, user_id, session_id, message, response, created_at) "
+        "SELECT gen_random_uuid(), u.id, gen_random_uuid(), 'hi', 'hello', now() - make_interval(mins => n) "
+        "FROM users u CROSS JOIN generate_series(1, 20) AS n WHERE u.email LIKE 'explain-' || :tag || '-%'",
+
+        # Mostly staff-only notices; a few for parents and a few for everyone (NULL)
+        "INSERT INTO announcements (id, title, content, target_roles, is_pinned, is_active, publish_date) "
+        "SELECT gen_random_uuid(), 'Explain ' || :tag || ' ' || n, 'Notice', "
+        "CASE n % 50 WHEN 0 THEN NULL WHEN 1 THEN ARRAY['parent']::user_role[] "
+        "ELSE ARRAY['instructor', 'finance']::user_role[] END, n % 97 = 0, n % 13 <> 0, "
+        "current_date - n % 365 FROM generate_series(1, :announcements) AS n",
+    ]
+    params = {"tag": tag, "families": families, "classes": classes, "events": events, "announcements": families * 4}
+    async with AsyncSessionLocal() as db:
+        for statement in statements:
+            await db.execute(text(statement), params)
+        await db.commit()
+        for table in ("users", "parents", "accounts", "students", "classes", "enrollments",
+                      "events", "event_participants", "transactions", "chat_logs", "announcements"):
+            await db.execute(text(f"ANALYZE {table}"))
+        await db.commit()
+
+
+async def cleanup(tag: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "DELETE FROM chat_logs WHERE user_id IN "
+                "(SELECT id FROM users WHERE email LIKE 'explain-' || :tag || '-%')"
+            ),
+            {"tag": tag}
+        )
+        await db.execute(text("DELETE FROM classes WHERE name LIKE 'Explain ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM events WHERE title LIKE 'Explain ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM announcements WHERE title LIKE 'Explain ' || :tag || ' %'"), {"tag": tag})
+        await db.execute(text("DELETE FROM users WHERE email LIKE 'explain-' || :tag || '-%'"), {"tag": tag})
+        await db.commit()
+
+
+async def sample(tag: str) -> dict:
+    """Ids of a typical family, class and account to run the queries for"""
+    async with AsyncSessionLocal() as db:
+        user_id, parent_id, account_id = (await db.execute(
+            text(
+                "SELECT u.id, p.id, a.id FROM users u JOIN parents p ON p.user_id = u.id "
+                "JOIN accounts a ON a.parent_id = p.id WHERE u.email LIKE 'explain-' || :tag || '-%' "
+                "ORDER BY u.id LIMIT 1"
+            ),
+            {"tag": tag}
+        )).one()
+        class_id = (await db.execute(
+            text(
+                "SELECT e.class_id FROM enrollments e JOIN classes c ON c.id = e.class_id "
+                "WHERE c.name LIKE 'Explain ' || :tag || ' %' AND e.status = 'waitlisted' AND c.is_active LIMIT 1"
+            ),
+            {"tag": tag}
+        )).scalar_one()
+    return {"user_id": user_id, "parent_id": parent_id, "account_id": account_id, "class_id": class_id}
+
+
+@contextmanager
+def capture():
+    """Record every statement (with its parameters) sent while the block runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def index_scans(plan: dict) -> set:
+    found = set()
+    if plan.get("Node Type") in INDEX_SCANS:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found |= index_scans(child)
+    return found
+
+
+async def explain(db, run) -> set:
+    """Run the app code, then EXPLAIN each statement it issued"""
+    with capture() as statements:
+        await run(db)
+    conn = await db.connection()
+    used = set()
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        used |= index_scans(plan[0]["Plan"])
+    return used
+
+
+def checks(ids: dict) -> list:
+    """(name, app code to run, indexes its plan must use)"""
+    cursor = encode_cursor(datetime.now(timezone.utc), uuid.uuid4())
+
+    async def parent_and_account(db):
+        await dashboard_service.load_parent_and_account(db, ids["user_id"])
+
+    async def students_with_enrollments(db):
+        await dashboard_service.load_students_with_enrollments(db, ids["parent_id"])
+
+    async def recent_transactions(db):
+        await dashboard_service.load_recent_transactions(db, SimpleNamespace(id=ids["account_id"]))
+
+    async def upcoming_events(db):
+        await dashboard_service.load_upcoming_events(db, ids["parent_id"])
+
+    async def list_classes(db):
+        query = enrollment_service.with_availability(
+            select(DanceClass), enrollment_service.waitlist_counts()
+        ).where(DanceClass.is_active == True).where(DanceClass.day_of_week == 3)
+        await db.execute(query.order_by(DanceClass.day_of_week, DanceClass.start_time))
+
+    async def active_count(db):
+        await db.execute(
+            select(func.count()).select_from(Enrollment).where(
+                (Enrollment.class_id == ids["class_id"]) & (Enrollment.status == enrollment_service.ACTIVE)
+            )
+        )
+
+    async def reserve_seat(db):
+        await enrollment_service.reserve_seat(db, ids["class_id"])
+
+    async def waitlist_head(db):
+        await db.execute(
+            select(Enrollment)
+            .where((Enrollment.class_id == ids["class_id"]) & (Enrollment.status == enrollment_service.WAITLISTED))
+            .order_by(Enrollment.enrollment_date, Enrollment.created_at)
+            .limit(1)
+        )
+
+    async def account_transactions(db):
+        await db.execute(paginate_newest_first(
+            select(Transaction).where(Transaction.account_id == ids["account_id"]), Transaction, cursor, 0, 50
+        ))
+
+    async def all_transactions(db):
+        await db.execute(paginate_newest_first(select(Transaction), Transaction, cursor, 0, 50))
+
+    async def announcement_feed(db):
+        await build_feed(db, "parent", date.today())
+
+    async def chat_history(db):
+        await db.execute(paginate_newest_first(
+            select(ChatLog).where(ChatLog.user_id == ids["user_id"]), ChatLog, cursor, 0, 20
+        ))
+
+    return [
+        ("dashboard: parent + account", parent_and_account, {"idx_parents_user"}),
+        ("dashboard: students + enrollments", students_with_enrollments, {"idx_enrollments_student_status"}),
+        ("dashboard: recent transactions", recent_transactions, {"idx_transactions_account_created_id"}),
+        ("dashboard: upcoming events", upcoming_events,
+         {"idx_events_active_start", "idx_event_participants_event_student"}),
+        ("list_classes (by day)", list_classes, {"idx_classes_active_schedule", "idx_enrollments_class_waitlisted"}),
+        ("enrollment: active seat count", active_count, {"idx_enrollments_class_active"}),
+        ("enrollment: reserve_seat", reserve_seat, {"classes_pkey"}),
+        ("enrollment: waitlist promotion", waitlist_head, {"idx_enrollments_class_waitlisted"}),
+        ("transactions: account keyset page", account_transactions, {"idx_transactions_account_created_id"}),
+        ("transactions: keyset page", all_transactions, {"idx_transactions_created_id"}),
+        ("chat history: keyset page", chat_history, {"idx_chat_logs_user_created_id"}),
+        ("announcement feed (parent)", announcement_feed,
+         {"idx_announcements_target_roles", "idx_announcements_everyone"}),
+    ]
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    print(f"Seeding {args.families:,} families, {args.classes:,} classes, {args.events:,} events (run {tag})...")
+    await seed(tag, args.families, args.classes, args.events)
+    failures = 0
+    try:
+        ids = await sample(tag)
+        for name, run, expected in checks(ids):
+            async with AsyncSessionLocal() as db:
+                used = await explain(db, run)
+                await db.rollback()
+            missing = expected - used
+            failures += bool(missing)
+            status = "ok  " if not missing else "FAIL"
+            detail = f"missing {sorted(missing)}; " if missing else ""
+            print(f"{status} {name:<36} {detail}plan uses {sorted(used) or 'no index'}")
+    finally:
+        await cleanup(tag)
+        await engine.dispose()
+    if failures:
+        raise SystemExit(f"{failures} queries are not using their intended index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--families", type=int, default=5000)
+    parser.add_argument("--classes", type=int, default=400)
+    parser.add_argument("--events", type=int, default=600)
+    asyncio.run(main(parser.parse_args()))
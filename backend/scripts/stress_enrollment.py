@@ -0,0 +1,185 @@
+"""Stress the enrollment engine: many parallel enrolls against one small class.
+
+Seeds a class with S seats and N students, then fires N concurrent
+enrollment_service.enroll() calls at it, each in its own session and
+transaction, all released at the same moment. Fails unless exactly S
+enrollments are active, enrolled_count equals S, and every other call was
+rejected as full (or waitlisted with --waitlist). A second round then drops
+D of the active students while J new students join the waitlist, all at
+once; it fails if a seat is left free while someone is still waiting, or if
+enrolled_count no longer matches the active rows. The seed data is removed
+afterwards.
+
+    cd backend && python -m scripts.stress_enrollment --students 200 --seats 20 --drops 10 --joiners 50
+"""
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import and_, select, text
+
+from app.database import AsyncSessionLocal, engine
+from app.models.models import Enrollment
+from app.services import enrollment_service
+
+
+async def seed(tag: str, students: int, seats: int) -> tuple:
+    user_id, parent_id, class_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+                "VALUES (:id, :email, 'x', 'Enroll', 'Stress', 'parent')"
+            ),
+            {"id": user_id, "email": f"enroll-stress-{tag}@example.invalid"}
+        )
+        await db.execute(
+            text("INSERT INTO parents (id, user_id) VALUES (:id, :user_id)"),
+            {"id": parent_id, "user_id": user_id}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO students (id, parent_id, first_name, last_name) "
+                "SELECT gen_random_uuid(), :parent_id, 'Kid ' || n, 'Stress' FROM generate_series(1, :students) AS n"
+            ),
+            {"parent_id": parent_id, "students": students}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO classes (id, name, max_capacity, enrolled_count, is_active) "
+                "VALUES (:id, :name, :seats, 0, true)"
+            ),
+            {"id": class_id, "name": f"Enroll stress {tag}", "seats": seats}
+        )
+        student_ids = list((await db.execute(
+            text("SELECT id FROM students WHERE parent_id = :parent_id"), {"parent_id": parent_id}
+        )).scalars())
+        await db.commit()
+    return user_id, class_id, student_ids
+
+
+async def cleanup(user_id, class_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM classes WHERE id = :id"), {"id": class_id})
+        await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await db.commit()
+
+
+async def enroll_one(start: asyncio.Event, student_id, class_id, waitlist: bool) -> str:
+    await start.wait()
+    async with AsyncSessionLocal() as db:
+        try:
+            outcome = await enrollment_service.enroll(db, student_id, class_id, allow_waitlist=waitlist)
+        except enrollment_service.ClassFullError:
+            await db.rollback()
+            return "full"
+        await db.commit()
+        return outcome
+
+
+async def drop_one(start: asyncio.Event, student_id, class_id) -> None:
+    """Drop an active enrollment the way DELETE /classes/{id}/enroll/{student_id} does"""
+    await start.wait()
+    async with AsyncSessionLocal() as db:
+        await enrollment_service.lock_class(db, class_id)
+        enrollment = (await db.execute(
+            select(Enrollment)
+            .where(and_(Enrollment.student_id == student_id, Enrollment.class_id == class_id))
+            .with_for_update()
+        )).scalar_one()
+        await enrollment_service.drop(db, enrollment)
+        await db.commit()
+
+
+async def class_state(class_id) -> tuple:
+    """(active rows, waitlisted rows, enrolled_count)"""
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            text(
+                "SELECT count(*) FILTER (WHERE e.status = 'active'), "
+                "count(*) FILTER (WHERE e.status = 'waitlisted'), "
+                "(SELECT enrolled_count FROM classes WHERE id = :id) "
+                "FROM enrollments e WHERE e.class_id = :id"
+            ),
+            {"id": class_id}
+        )).one()
+
+
+async def race_drops(class_id, seats: int, dropping: list, joining: list) -> None:
+    start = asyncio.Event()
+    calls = [asyncio.create_task(drop_one(start, student_id, class_id)) for student_id in dropping]
+    calls += [asyncio.create_task(enroll_one(start, student_id, class_id, True)) for student_id in joining]
+    await asyncio.sleep(0)
+    start.set()
+    await asyncio.gather(*calls)
+
+    active, waitlisted, enrolled_count = await class_state(class_id)
+    print(
+        f"{len(dropping)} drops racing {len(joining)} waitlist joins: "
+        f"rows active={active} waitlisted={waitlisted}, enrolled_count={enrolled_count}"
+    )
+    assert enrolled_count == active, f"enrolled_count is {enrolled_count}, {active} rows are active"
+    assert active <= seats, f"{active} active enrollments in {seats} seats"
+    assert active == seats or waitlisted == 0, f"{seats - active} seats free while {waitlisted} students wait"
+    print("OK: every freed seat went to the waitlist")
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    user_id, class_id, student_ids = await seed(tag, args.students + args.joiners, args.seats)
+    student_ids, joiners = student_ids[:args.students], student_ids[args.students:]
+    try:
+        start = asyncio.Event()
+        calls = [
+            asyncio.create_task(enroll_one(start, student_id, class_id, args.waitlist))
+            for student_id in student_ids
+        ]
+        await asyncio.sleep(0)
+        start.set()
+        outcomes = await asyncio.gather(*calls)
+
+        async with AsyncSessionLocal() as db:
+            active = (await db.execute(
+                text("SELECT count(*) FROM enrollments WHERE class_id = :id AND status = 'active'"),
+                {"id": class_id}
+            )).scalar_one()
+            waitlisted = (await db.execute(
+                text("SELECT count(*) FROM enrollments WHERE class_id = :id AND status = 'waitlisted'"),
+                {"id": class_id}
+            )).scalar_one()
+            enrolled_count = (await db.execute(
+                text("SELECT enrolled_count FROM classes WHERE id = :id"), {"id": class_id}
+            )).scalar_one()
+
+        tally = {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))}
+        print(
+            f"{len(outcomes)} parallel enrolls into {args.seats} seats: {tally}; "
+            f"rows active={active} waitlisted={waitlisted}, enrolled_count={enrolled_count}"
+        )
+        others = len(outcomes) - args.seats
+        assert active == args.seats, f"expected {args.seats} active enrollments, found {active}"
+        assert enrolled_count == args.seats, f"enrolled_count is {enrolled_count}, expected {args.seats}"
+        assert tally.get(enrollment_service.ACTIVE, 0) == args.seats
+        if args.waitlist:
+            assert waitlisted == others and tally.get(enrollment_service.WAITLISTED, 0) == others
+        else:
+            assert waitlisted == 0 and tally.get("full", 0) == others
+        print("OK: no overbooking")
+
+        active_students = [
+            student_id for student_id, outcome in zip(student_ids, outcomes) if outcome == enrollment_service.ACTIVE
+        ]
+        await race_drops(class_id, args.seats, active_students[:args.drops], joiners)
+    finally:
+        await cleanup(user_id, class_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--seats", type=int, default=20)
+    parser.add_argument("--waitlist", action="store_true")
+    parser.add_argument("--drops", type=int, default=10)
+    parser.add_argument("--joiners", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
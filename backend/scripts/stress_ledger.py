@@ -0,0 +1,123 @@
+"""Stress the balance engine with parallel payments and charges on one account.
+
+Seeds one account, then runs N concurrent writes against it the way the
+billing routes do (ledger_service.apply_delta plus the Transaction row, one
+commit each), mixing charges and payments. Fails unless the final balance
+equals the sum of the ledger, the running totals match it too, and
+reconcile_balances reports no drift for the account. The seed data is
+removed afterwards.
+
+    cd backend && python -m scripts.stress_ledger --writes 500
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, engine
+from app.models.models import Transaction
+from app.services import ledger_service
+
+
+async def seed(tag: str) -> tuple:
+    user_id, parent_id, account_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, first_name, last_name, role) "
+                "VALUES (:id, :email, 'x', 'Ledger', 'Stress', 'parent')"
+            ),
+            {"id": user_id, "email": f"ledger-stress-{tag}@example.invalid"}
+        )
+        await db.execute(
+            text("INSERT INTO parents (id, user_id) VALUES (:id, :user_id)"),
+            {"id": parent_id, "user_id": user_id}
+        )
+        await db.execute(
+            text(
+                "INSERT INTO accounts (id, parent_id, current_balance, total_charges, total_payments, total_credits) "
+                "VALUES (:id, :parent_id, 0, 0, 0, 0)"
+            ),
+            {"id": account_id, "parent_id": parent_id}
+        )
+        await db.commit()
+    return user_id, account_id
+
+
+async def cleanup(user_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await db.commit()
+
+
+async def write(start: asyncio.Event, account_id, amount: Decimal, transaction_type: str) -> None:
+    await start.wait()
+    async with AsyncSessionLocal() as db:
+        assert await ledger_service.apply_delta(db, account_id, amount, transaction_type) is not None
+        db.add(Transaction(
+            account_id=account_id,
+            amount=amount,
+            transaction_type=transaction_type,
+            description="Ledger stress",
+            status="completed"
+        ))
+        await db.commit()
+
+
+async def main(args) -> None:
+    tag = uuid.uuid4().hex[:8]
+    rng = random.Random(args.seed)
+    user_id, account_id = await seed(tag)
+    try:
+        writes = []
+        for _ in range(args.writes):
+            amount = Decimal(rng.randint(100, 20000)) / 100
+            if rng.random() < 0.5:
+                writes.append((amount, "charge"))
+            else:
+                writes.append((-amount, "payment"))
+
+        start = asyncio.Event()
+        tasks = [asyncio.create_task(write(start, account_id, amount, kind)) for amount, kind in writes]
+        await asyncio.sleep(0)
+        start.set()
+        await asyncio.gather(*tasks)
+
+        expected = sum((amount for amount, _ in writes), Decimal("0"))
+        async with AsyncSessionLocal() as db:
+            balance, charges, payments, credits = (await db.execute(
+                text(
+                    "SELECT current_balance, total_charges, total_payments, total_credits "
+                    "FROM accounts WHERE id = :id"
+                ),
+                {"id": account_id}
+            )).one()
+            ledger = (await db.execute(
+                text("SELECT coalesce(sum(amount), 0) FROM transactions WHERE account_id = :id AND status = 'completed'"),
+                {"id": account_id}
+            )).scalar_one()
+            report = await ledger_service.reconcile_balances(db)
+
+        drifted = [row for row in report["drifted"] if row["account_id"] == str(account_id)]
+        print(
+            f"{len(writes)} parallel writes: balance {balance}, ledger {ledger}, expected {expected}; "
+            f"charges {charges} payments {payments} credits {credits}; "
+            f"reconcile: {report['accounts_drifted']} drifted of {report['accounts_checked']}"
+        )
+        assert balance == ledger == expected, "lost update: balance does not match the ledger"
+        assert charges - payments - credits == balance, "running totals do not add up to the balance"
+        assert not drifted, f"reconcile_balances reports drift: {drifted}"
+        print("OK: no lost updates")
+    finally:
+        await cleanup(user_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
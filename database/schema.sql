@@ -104,6 +104,7 @@ CREATE TABLE classes (
     end_time TIME,
     studio_room VARCHAR(50),
     max_capacity INTEGER DEFAULT 20,
+    enrolled_count INTEGER NOT NULL DEFAULT 0, -- active enrollments, maintained by the API
     monthly_tuition DECIMAL(10,2) DEFAULT 0.00,
     is_active BOOLEAN DEFAULT true,
     start_date DATE,
@@ -129,7 +130,7 @@ CREATE TABLE enrollments (
     student_id UUID REFERENCES students(id) ON DELETE CASCADE,
     class_id UUID REFERENCES classes(id) ON DELETE CASCADE,
     enrollment_date DATE DEFAULT CURRENT_DATE,
-    status VARCHAR(20) DEFAULT 'active', -- active, dropped, completed
+    status VARCHAR(20) DEFAULT 'active', -- active, waitlisted, dropped, completed
     drop_date DATE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(student_id, class_id)
@@ -167,6 +168,10 @@ CREATE TABLE accounts (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     parent_id UUID REFERENCES parents(id) ON DELETE CASCADE UNIQUE,
     current_balance DECIMAL(10,2) DEFAULT 0.00, -- positive = owes, negative = credit
+    total_charges DECIMAL(12,2) NOT NULL DEFAULT 0, -- running totals, maintained by the API
+    total_payments DECIMAL(12,2) NOT NULL DEFAULT 0,
+    total_credits DECIMAL(12,2) NOT NULL DEFAULT 0,
+    last_activity_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -185,6 +190,21 @@ CREATE TABLE transactions (
     due_date DATE,
     paid_date DATE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_by UUID REFERENCES users(id),
+    idempotency_key VARCHAR(100) UNIQUE -- e.g. tuition:<period>:<enrollment id>
+);
+
+-- BILLING RUNS (one per monthly tuition period, resumable)
+CREATE TABLE billing_runs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    period DATE UNIQUE NOT NULL, -- first day of the billed month
+    status VARCHAR(20) NOT NULL DEFAULT 'running', -- running, completed
+    last_account_id UUID, -- resume cursor
+    accounts_billed INTEGER NOT NULL DEFAULT 0,
+    charges_created INTEGER NOT NULL DEFAULT 0,
+    amount_billed DECIMAL(12,2) NOT NULL DEFAULT 0,
+    started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP WITH TIME ZONE,
     created_by UUID REFERENCES users(id)
 );
 
@@ -231,7 +251,7 @@ CREATE TABLE announcements (
     title VARCHAR(255) NOT NULL,
     content TEXT NOT NULL,
     author_id UUID REFERENCES users(id),
-    target_roles user_role[], -- null = all roles
+    target_roles user_role[], -- null = all roles (never empty)
     is_pinned BOOLEAN DEFAULT false,
     is_active BOOLEAN DEFAULT true,
     publish_date DATE DEFAULT CURRENT_DATE,
@@ -297,14 +317,40 @@ CREATE TABLE chat_logs (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- AI CHAT SESSIONS (shared conversation history across workers)
+CREATE TABLE chat_sessions (
+    session_id VARCHAR(64) PRIMARY KEY,
+    history JSONB NOT NULL DEFAULT '[]',
+    size_bytes INTEGER DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for performance
 CREATE INDEX idx_students_parent ON students(parent_id);
 CREATE INDEX idx_enrollments_student ON enrollments(student_id);
 CREATE INDEX idx_enrollments_class ON enrollments(class_id);
 CREATE INDEX idx_transactions_account ON transactions(account_id);
 CREATE INDEX idx_transactions_created ON transactions(created_at);
+-- Keyset pagination on (created_at, id), newest first
+CREATE INDEX idx_transactions_created_id ON transactions(created_at DESC, id DESC);
+CREATE INDEX idx_transactions_account_created_id ON transactions(account_id, created_at DESC, id DESC);
+CREATE INDEX idx_users_created_id ON users(created_at DESC, id DESC);
+CREATE INDEX idx_chat_logs_user_created_id ON chat_logs(user_id, created_at DESC, id DESC);
+-- Indexes matched to API query shapes (see backend/alembic/versions/0002)
+CREATE INDEX idx_enrollments_class_active ON enrollments(class_id) WHERE status = 'active';
+CREATE INDEX idx_enrollments_class_waitlisted ON enrollments(class_id, enrollment_date, created_at) WHERE status = 'waitlisted';
+CREATE INDEX idx_enrollments_student_status ON enrollments(student_id, status);
+CREATE INDEX idx_events_active_start ON events(start_date) WHERE is_active;
+CREATE UNIQUE INDEX idx_event_participants_event_student ON event_participants(event_id, student_id);
+CREATE INDEX idx_event_participants_student ON event_participants(student_id);
+CREATE UNIQUE INDEX idx_parents_user ON parents(user_id);
+CREATE INDEX idx_classes_active_schedule ON classes(day_of_week, start_time) WHERE is_active;
+CREATE INDEX idx_accounts_balance ON accounts(current_balance DESC);
+CREATE INDEX idx_announcements_target_roles ON announcements USING gin (target_roles) WHERE is_active;
+CREATE INDEX idx_announcements_everyone ON announcements(publish_date) WHERE is_active AND target_roles IS NULL;
 CREATE INDEX idx_classes_day ON classes(day_of_week);
 CREATE INDEX idx_events_dates ON events(start_date, end_date);
+CREATE INDEX idx_chat_sessions_updated ON chat_sessions(updated_at);
 
 -- Trigger to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()